@@ -5,6 +5,7 @@ from animations.fireworksV1 import createFireworksV1
 from animations.fireworksV2 import createFireworksV2
 from animations.fountain import createFountain
 from animations.lightShow import createLightShow
+from config.config import bCon
 
 def animate(animation, track_mask, animation_type):
     if animation == "barGraph":
@@ -23,3 +24,7 @@ def animate(animation, track_mask, animation_type):
         createLightShow(trackMask=track_mask, typeAnim=animation_type)
     else:
         print("Invalid animation type")
+        return
+
+    # Animations are built with bDat and F-Curves only, evaluate the scene once when done
+    bCon.view_layer.update()
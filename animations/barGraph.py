@@ -1,8 +1,8 @@
 from config.globals import *
-from config.config import bDat, BlenderObjectType
+from config.config import BlenderObjectType
 from utils.collection import createCollection
 from utils.object import createBlenderObject, createDuplicateLinkedObject
-from utils.animation import noteAnimate
+from utils.animation import KeyframeBuffer, computeTracksNoteData, noteIndexesByPitch, noteAnimate
 from utils.stuff import wLog, parseRangeFromTracks, colorFromNoteNumber
 
 """
@@ -57,6 +57,12 @@ def createBlenderBGAnimation(trackMask, typeAnim):
     noteMidRange = (noteMin + noteMax) / 2
     cubeSpace = BGModelCube.scale.x * 1.2 # mean x size of cube + 20 %
 
+    # Black / white key color of every MIDI note, computed once
+    noteColors = [colorFromNoteNumber(note % 12) for note in range(128)]
+
+    # Cubes by (trackIndex, noteNumber), avoid a name lookup in bDat.objects per note
+    cubes = {}
+
     # Parse track to create BG
     for trackCount, trackIndex in enumerate(listOfSelectedTrack):
         track = glb.tracks[trackIndex]
@@ -73,7 +79,8 @@ def createBlenderBGAnimation(trackMask, typeAnim):
             offsetY = (trackCount - trackCenter) * cubeSpace + cubeSpace / 2
             cubeLinked = createDuplicateLinkedObject(BGTrackCollect, BGModelCube, cubeName, independant=False)
             cubeLinked.location = (offsetX, offsetY, 0)
-            cubeLinked["baseColor"] = colorFromNoteNumber(note % 12)
+            cubeLinked["baseColor"] = noteColors[note]
+            cubes[(trackIndex, note)] = cubeLinked
                 
         wLog(f"BarGraph - create {len(track.notesUsed)} cubes for track {trackIndex} (range noteMin-noteMax) ({track.minNote}-{track.maxNote})")
 
@@ -100,16 +107,22 @@ def createBlenderBGAnimation(trackMask, typeAnim):
             obj["baseColor"] = 1.0 # Cyan
 
     # Animate cubes accordingly to notes event
+    tracksNoteData = computeTracksNoteData([glb.tracks[trackIndex] for trackIndex in listOfSelectedTrack])
+    keyframes = KeyframeBuffer()
     for trackCount, trackIndex in enumerate(listOfSelectedTrack):
         # wLog(f"trackCount={trackCount} & trackIndex={trackIndex}")
         track = glb.tracks[trackIndex]
-        for noteIndex, note in enumerate(track.notes):
-            # Construct the cube name and animate
-            cubeName = f"Cube-{trackIndex}-{note.noteNumber}"
-            noteObj = bDat.objects[cubeName]
-            noteAnimate(noteObj, typeAnim, track, noteIndex, tracksColor[trackCount])
+        frames, levels = tracksNoteData[trackCount]
+        # Object by object, all notes of a pitch in sequence
+        for noteIndex in noteIndexesByPitch(track):
+            note = track.notes[noteIndex]
+            # Retrieve the cube and animate
+            noteObj = cubes[(trackIndex, note.noteNumber)]
+            noteAnimate(noteObj, typeAnim, track, noteIndex, tracksColor[trackCount], keyframes, frames, levels)
+
+        wLog(f"BarGraph - Animate cubes for track {trackIndex} (notesCount) ({len(track.notes) - 1})")
 
-        wLog(f"BarGraph - Animate cubes for track {trackIndex} (notesCount) ({noteIndex})")
+    keyframes.write()
         
     return
 
@@ -2,7 +2,7 @@ from config.globals import *
 from config.config import bDat, BlenderObjectType
 from utils.collection import createCollection
 from utils.object import createBlenderObject, createDuplicateLinkedObject
-from utils.animation import noteAnimate
+from utils.animation import KeyframeBuffer, computeTracksNoteData, noteIndexesByPitch, noteAnimate
 from utils.stuff import wLog, parseRangeFromTracks
 
 """
@@ -167,20 +167,23 @@ def createFireworksV1(trackMask, typeAnim):
 
     # create sparklesCloudGN and set parameters
     createSparklesCloudGN("SparklesCloud", FWModelSphere, glb.matGlobalCustom)
-    radiusSparklesCloud = FWModelSphere.modifiers["SparklesCloud"].node_group.interface.items_tree["radiusSparklesCloud"].identifier
-    FWModelSphere.modifiers["SparklesCloud"][radiusSparklesCloud] = 1.0
-    radiusSparkles = FWModelSphere.modifiers["SparklesCloud"].node_group.interface.items_tree["radiusSparkles"].identifier
-    FWModelSphere.modifiers["SparklesCloud"][radiusSparkles] = 0.02
-    densityCloud = FWModelSphere.modifiers["SparklesCloud"].node_group.interface.items_tree["densityCloud"].identifier
-    FWModelSphere.modifiers["SparklesCloud"][densityCloud] = 0.1
-    sparkleMaterial = FWModelSphere.modifiers["SparklesCloud"].node_group.interface.items_tree["sparkleMaterial"].identifier
-    FWModelSphere.modifiers["SparklesCloud"][sparkleMaterial] = glb.matGlobalCustom
+    sparklesCloud = FWModelSphere.modifiers["SparklesCloud"]
+    itemsTree = sparklesCloud.node_group.interface.items_tree
+    sparklesCloud[itemsTree["radiusSparklesCloud"].identifier] = 1.0
+    sparklesCloud[itemsTree["radiusSparkles"].identifier] = 0.02
+    sparklesCloud[itemsTree["densityCloud"].identifier] = 0.1
+    sparklesCloud[itemsTree["sparkleMaterial"].identifier] = glb.matGlobalCustom
+    # the duplicated spheres share the node group, seed identifier looked up once
+    densitySeed = itemsTree["densitySeed"].identifier
        
     spaceX = 5
     spaceY = 5
     offsetX = 5.5 * spaceX # center of the octave, mean between fifth and sixt note
     offsetY = (octaveCount * spaceY) - (spaceY / 2)
 
+    # Spheres by (trackIndex, noteNumber), names are for display only
+    spheres = {}
+
     # Construction
     noteCount = 0
     for trackCount, trackIndex in enumerate(listOfSelectedTrack):
@@ -200,21 +203,27 @@ def createFireworksV1(trackMask, typeAnim):
             sphereLinked.scale = (0,0,0)
             sphereLinked["baseColor"] = tracksColor[trackCount]
             sphereLinked["emissionColor"] = tracksColor[trackCount]
-            sparkleCloudSeed = sphereLinked.modifiers["SparklesCloud"].node_group.interface.items_tree["densitySeed"].identifier
-            sphereLinked.modifiers["SparklesCloud"][sparkleCloudSeed] = noteCount
+            sphereLinked.modifiers["SparklesCloud"][densitySeed] = noteCount
+            spheres[(trackIndex, note)] = sphereLinked
 
         wLog(f"Fireworks - create {noteCount} sparkles cloud for track {trackIndex} (range noteMin-noteMax) ({track.minNote}-{track.maxNote})")
 
     # Animation
+    tracksNoteData = computeTracksNoteData([tracks[trackIndex] for trackIndex in listOfSelectedTrack])
+    keyframes = KeyframeBuffer()
     for trackCount, trackIndex in enumerate(listOfSelectedTrack):
         track = tracks[trackIndex]
+        frames, levels = tracksNoteData[trackCount]
+
+        # Object by object, all notes of a pitch in sequence
+        for noteIndex in noteIndexesByPitch(track):
+            note = track.notes[noteIndex]
+            # Retrieve the sphere and animate
+            noteObj = spheres[(trackIndex, note.noteNumber)]
+            noteAnimate(noteObj, typeAnim, track, noteIndex, tracksColor[trackCount-1], keyframes, frames, levels)
 
-        for noteIndex, note in enumerate(track.notes):
-            # Construct the sphere name and animate
-            objName = f"Sphere-{trackIndex}-{note.noteNumber}"
-            noteObj = bDat.objects[objName]
-            noteAnimate(noteObj, typeAnim, track, noteIndex, tracksColor[trackCount-1])
+        wLog(f"Fireworks - Animate sparkles cloud for track {trackIndex} (notesCount) ({len(track.notes) - 1})")
 
-        wLog(f"Fireworks - Animate sparkles cloud for track {trackIndex} (notesCount) ({noteIndex})")
+    keyframes.write()
 
     return
@@ -2,6 +2,7 @@ from config.globals import *
 from config.config import bDat, BlenderObjectType
 from utils.collection import createCollection
 from utils.object import createBlenderObject, createDuplicateLinkedObject
+from utils.animation import computeNoteOnOffFrames
 from utils.stuff import wLog, parseRangeFromTracks
 
 """
@@ -46,7 +47,6 @@ def createFireworksV2(trackMask, typeAnim):
 
     listOfSelectedTrack, noteMin, noteMax, octaveCount, tracksProcessed, tracksColor = parseRangeFromTracks(trackMask)
     tracks = glb.tracks
-    fps = glb.fps
 
     # Create master BG collection
     FWCollect = createCollection("FireworksV2", glb.masterCollection)
@@ -79,6 +79,10 @@ def createFireworksV2(trackMask, typeAnim):
     octaveCenter = ((octaveMax - octaveMin) / 2) + octaveMin
     trackCenter = (len(tracks)-1) / 2
 
+    # Emitter and sparkles objects by (trackIndex, noteNumber), names are for display only
+    emitters = {}
+    sparkles = {}
+
     # Construction
     noteCount = 0
     for trackCount, trackIndex in enumerate(listOfSelectedTrack):
@@ -99,25 +103,27 @@ def createFireworksV2(trackMask, typeAnim):
             sphereLinked.location = (pX, pY, pZ)
             sphereLinked.scale = (1,1,1)
             sphereLinked["alpha"] = 0.0
+            emitters[(trackIndex, note)] = sphereLinked
             sparkleName = f"noteSparkles-{trackIndex}-{note}"
             sphereLinked = createDuplicateLinkedObject(glb.hiddenCollection, FWModelSparkle, sparkleName, independant=False)
             sphereLinked.location = (pX, pY, pZ)
             sphereLinked.scale = (1,1,1)
             sphereLinked["baseColor"] = tracksColor[trackCount]
             sphereLinked["emissionColor"] = tracksColor[trackCount]
+            sparkles[(trackIndex, note)] = sphereLinked
 
         wLog(f"Fireworks V2 - create {len(track.notesUsed)} sparkles cloud for track {trackIndex} (range noteMin-noteMax) ({track.minNote}-{track.maxNote})")
 
         # create animation
         noteCount = 0
+        framesOn, framesOff = computeNoteOnOffFrames(track)
         for noteIndex, note in enumerate(track.notes):
             noteCount += 1
             
-            frameTimeOn = int(note.timeOn * fps)
-            frameTimeOff = int(note.timeOff * fps)
+            frameTimeOn = framesOn[noteIndex]
+            frameTimeOff = framesOff[noteIndex]
 
-            emitterName = f"noteEmitter-{trackIndex}-{note.noteNumber}"
-            emitterObj = bDat.objects[emitterName]
+            emitterObj = emitters[(trackIndex, note.noteNumber)]
 
             # Add a particle system to the object
             psName = f"PS-{noteCount}"
@@ -138,8 +144,7 @@ def createFireworksV2(trackMask, typeAnim):
             # Set the particle system to render the sparkle object
             Brigthness = 4 + (note.velocity * 10)
             particleSettings.render_type = 'OBJECT'
-            sparkleName = f"noteSparkles-{trackIndex}-{note.noteNumber}"
-            sparkleObj = bDat.objects[sparkleName]
+            sparkleObj = sparkles[(trackIndex, note.noteNumber)]
             sparkleObj["emissionStrength"] = Brigthness
 
             particleSettings.instance_object = sparkleObj
@@ -3,7 +3,7 @@ from config.config import bDat, bScn, BlenderObjectType
 from utils.collection import createCollection
 from utils.object import createBlenderObject, createDuplicateLinkedObject
 from utils.stuff import wLog, parseRangeFromTracks, extractOctaveAndNote, colorFromNoteNumber
-from utils.animation import noteAnimate, distributeObjectsWithClampTo, animCircleCurve
+from utils.animation import KeyframeBuffer, computeTracksNoteData, computeNoteOnOffFrames, noteAnimate, distributeObjectsWithClampTo, animCircleCurve
 from math import radians, cos, sin, tan, degrees
 
 """
@@ -85,10 +85,13 @@ def createFountain(trackMask, typeAnim):
     # Construction of the fountain Targets
     theta = radians(360)  # 2 Pi, just one circle
     alpha = theta / 12  # 12 is the Number of notes per octave
+    # Targets by note number, avoid a name lookup in bDat.objects per note
+    targets = {}
     for note in range(132):
         octave, numNote = extractOctaveAndNote(note)
         targetName = f"Target-{numNote}-{octave}"
         targetObj = createDuplicateLinkedObject(fountainTargetCollection, fountainModelPlane, targetName, independant=False)
+        targets[note] = targetObj
         spaceY = 0.1
         spaceX = 0.1
         angle = (12 - note) * alpha
@@ -129,6 +132,9 @@ def createFountain(trackMask, typeAnim):
     fountainConstantsObj["delay"] = delayImpact
 
     emittersList = []
+    # Targets are shared by all tracks, keyframes are written once at the end
+    tracksNoteData = computeTracksNoteData([tracks[trackIndex] for trackIndex in listOfSelectedTrack])
+    keyframes = KeyframeBuffer()
     for trackCount, trackIndex in enumerate(listOfSelectedTrack):
         track = tracks[trackIndex]
 
@@ -152,18 +158,23 @@ def createFountain(trackMask, typeAnim):
         emitterObj["baseColor"] = tracksColor[trackCount]
         emitterObj["emissionColor"] = tracksColor[trackCount]
 
+        # bind lookups used for every note to locals
+        newModifier = emitterObj.modifiers.new
+        newParticleSettings = bDat.particles.new
+
         # One particle per note
+        framesOn, framesOff = computeNoteOnOffFrames(track)
         for noteIndex, note in enumerate(track.notes):
 
-            frameTimeOn = int(note.timeOn * fps)
-            frameTimeOff = int(note.timeOff * fps)
+            frameTimeOn = framesOn[noteIndex]
+            frameTimeOff = framesOff[noteIndex]
             octave, numNote = extractOctaveAndNote(note.noteNumber)
 
             # Add a particle system to the object
             pSystemName = f"ParticleSystem-{octave}-{noteIndex}"
-            particleSystem = emitterObj.modifiers.new(name=pSystemName, type='PARTICLE_SYSTEM')
+            particleSystem = newModifier(name=pSystemName, type='PARTICLE_SYSTEM')
             pSettingName = f"ParticleSettings-{octave}-{noteIndex}"
-            particleSettings = bDat.particles.new(name=pSettingName)
+            particleSettings = newParticleSettings(name=pSettingName)
             particleSystem.particle_system.settings = particleSettings
 
             # Configure particle system settings - Emission
@@ -183,8 +194,7 @@ def createFountain(trackMask, typeAnim):
 
             # Configure particle system settings - Velocity - Using drivers
             # Retrieve Target Object
-            targetName = f"Target-{numNote}-{octave}"
-            target = bDat.objects[targetName]
+            target = targets[note.noteNumber]
 
             # Add drivers for object_align_factors
             for i, axis in enumerate(['X', 'Y', 'Z']):
@@ -232,14 +242,15 @@ def createFountain(trackMask, typeAnim):
         wLog(f"Fountain - create {noteIndex} particles for track {trackIndex}")
 
         # Animate target
+        frames, levels = tracksNoteData[trackCount]
         for noteIndex, note in enumerate(track.notes):
-            octave, numNote = extractOctaveAndNote(note.noteNumber)
-            targetName = f"Target-{numNote}-{octave}"
-            noteObj = bDat.objects[targetName]
-            noteAnimate(noteObj, "MultiLight", track, noteIndex, tracksColor[trackCount])
+            noteObj = targets[note.noteNumber]
+            noteAnimate(noteObj, "MultiLight", track, noteIndex, tracksColor[trackCount], keyframes, frames, levels)
 
         wLog(f"Fountain - animate targets with {noteIndex} notes")
 
+    keyframes.write()
+
 
     # Create circle curve for trajectory of emitters
     radiusCurve = 20
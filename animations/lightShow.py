@@ -3,19 +3,35 @@ from config.config import bDat, BlenderObjectType
 from utils.collection import createCollection
 from utils.object import createBlenderObject, createDuplicateLinkedObject
 from utils.stuff import wLog, parseRangeFromTracks, extractOctaveAndNote
-from utils.animation import distributeObjectsWithClampTo, animCircleCurve
-from colorsys import hsv_to_rgb
+from utils.animation import KeyframeBuffer, computeNoteOnOffFrames, distributeObjectsWithClampTo, animCircleCurve
+import numpy as np
 
-# Return a list of color r,g,b,a dispatched
+# Return a list of color r,g,b dispatched
+# All hues converted at once, same formula as colorsys.hsv_to_rgb
 def generateHSVColors(nSeries):
-    colors = []
-    for i in range(nSeries):
-        hue = i / nSeries  # uniform space
-        saturation = 0.8    # Saturation high for vibrant color
-        value = 0.9         # High luminosity
-        r,g,b = hsv_to_rgb(hue, saturation, value)
-        colors.append((r,g,b))
-    return colors
+    hue = np.arange(nSeries) / nSeries  # uniform space
+    saturation = 0.8    # Saturation high for vibrant color
+    value = 0.9         # High luminosity
+    sector = (hue * 6.0).astype(np.int64)
+    f = (hue * 6.0) - sector
+    p = np.full(nSeries, value * (1.0 - saturation))
+    q = value * (1.0 - saturation * f)
+    t = value * (1.0 - saturation * (1.0 - f))
+    v = np.full(nSeries, value)
+    sector %= 6
+    r = np.choose(sector, (v, q, p, p, t, v))
+    g = np.choose(sector, (t, v, v, q, p, p))
+    b = np.choose(sector, (p, p, t, v, v, q))
+    return list(zip(r.tolist(), g.tolist(), b.tolist()))
+
+# Return the material with this alpha, created only if it does not already exist
+def getAlphaMaterial(name, alpha):
+    if name in bDat.materials:
+        return bDat.materials[name]
+    mat = bDat.materials.new(name=name)
+    mat.use_nodes = True
+    mat.node_tree.nodes["Principled BSDF"].inputs["Alpha"].default_value = alpha
+    return mat
 
 
 def createLightShow(trackMask, typeAnim):
@@ -24,7 +40,6 @@ def createLightShow(trackMask, typeAnim):
     
     listOfSelectedTrack, noteMin, noteMax, octaveCount, tracksProcessed, tracksColor = parseRangeFromTracks(trackMask)
     tracks = glb.tracks
-    fps = glb.fps
 
     # generate a track count list of dispatched colors
     randomHSVColors = generateHSVColors(len(glb.tracks))
@@ -44,14 +59,9 @@ def createLightShow(trackMask, typeAnim):
         rings=ringCount
     )
 
-    # Create the two materials
-    mat_opaque = bDat.materials.new(name="mat_opaque")
-    mat_opaque.use_nodes = True
-    mat_opaque.node_tree.nodes["Principled BSDF"].inputs["Alpha"].default_value = 1.0
-    
-    mat_trans = bDat.materials.new(name="mat_trans")
-    mat_trans.use_nodes = True
-    mat_trans.node_tree.nodes["Principled BSDF"].inputs["Alpha"].default_value = 0.0
+    # Get or create the two materials, shared by all spheres
+    mat_opaque = getAlphaMaterial("mat_opaque", 1.0)
+    mat_trans = getAlphaMaterial("mat_trans", 0.0)
     
     # Assign both materials to sphere
     lightShowModelUVSphere.data.materials.append(mat_opaque)  # Material index 0
@@ -100,6 +110,8 @@ def createLightShow(trackMask, typeAnim):
     #     wLog(f"Group {group.name} has {len(vertices_in_group)} vertices: {vertices_in_group}")
 
     sphereLights = []
+    # material_index keyframes of all spheres, written once at the end
+    keyframes = KeyframeBuffer()
     # Create on sphere per track
     for trackCount, trackIndex in enumerate(listOfSelectedTrack):
         track = tracks[trackIndex]
@@ -146,43 +158,28 @@ def createLightShow(trackMask, typeAnim):
         mesh = sphere.data
         for face in mesh.polygons:
             face.material_index = 0
-            face.keyframe_insert('material_index', frame=0)
+            keyframes.insert(mesh, f"polygons[{face.index}].material_index", 0, 0)
     
         # Animate the sphere
+        framesOn, framesOff = computeNoteOnOffFrames(track)
         for noteIndex, note in enumerate(track.notes):
-            # Find the previous note with the same note number
-            previousNote = None
-            for prevIndex in range(noteIndex - 1, -1, -1):
-                if track.notes[prevIndex].noteNumber == note.noteNumber:
-                    previousNote = track.notes[prevIndex]
-                    break
-
-            # Find the next note with the same note number
-            nextNote = None
-            for nextIndex in range(noteIndex + 1, len(track.notes)):
-                if track.notes[nextIndex].noteNumber == note.noteNumber:
-                    nextNote = track.notes[nextIndex]
-                    break
-
             octave, noteNumber = extractOctaveAndNote(note.noteNumber)
             noteName = f"note_{octave}-{noteNumber}"
-            noteFrameOn = int(note.timeOn * fps)
-            noteFrameOff = int(note.timeOff * fps)
+            noteFrameOn = framesOn[noteIndex]
+            noteFrameOff = framesOff[noteIndex]
             
             # Get face directly from stored index
             if noteName in note_faces:
-                face = mesh.polygons[note_faces[noteName]]
-                face.material_index = 0
-                face.keyframe_insert('material_index', frame=noteFrameOn - 1)
-                face.material_index = 1
-                face.keyframe_insert('material_index', frame=noteFrameOn)
-                face.material_index = 1
-                face.keyframe_insert('material_index', frame=noteFrameOff - 1)
-                face.material_index = 0
-                face.keyframe_insert('material_index', frame=noteFrameOff)
+                dataPath = f"polygons[{note_faces[noteName]}].material_index"
+                keyframes.insert(mesh, dataPath, noteFrameOn - 1, 0)
+                keyframes.insert(mesh, dataPath, noteFrameOn, 1)
+                keyframes.insert(mesh, dataPath, noteFrameOff - 1, 1)
+                keyframes.insert(mesh, dataPath, noteFrameOff, 0)
 
         wLog(f"Light Show - Animate track {trackIndex} with {noteIndex} notes")
 
+    keyframes.write()
+
     # Create circle curve for trajectory of spheres
     radiusCurve = 10
     lightShowTrajectory = createBlenderObject(
@@ -2,9 +2,10 @@ from config.globals import *
 from config.config import BlenderObjectType
 from utils.collection import createCollection
 from utils.object import createBlenderObject, createDuplicateLinkedObject
-from utils.animation import noteAnimate
+from utils.animation import KeyframeBuffer, computeTracksNoteData, noteAnimate
 from utils.stuff import wLog, parseRangeFromTracks, colorFromNoteNumber, extractOctaveAndNote
 from math import ceil
+import numpy as np
 
 """
 Creates a strip-based visualization of MIDI notes with animations.
@@ -35,7 +36,13 @@ def createStripNotes(trackMask, typeAnim):
 
     wLog(f"Create a Strip Notes Animation type = {typeAnim}")
 
-    listOfSelectedTrack, noteMin, noteMax, octaveCount, trackProcessed, tracksColor = parseRangeFromTracks(trackMask)
+    createStripNotesFromSelection(parseRangeFromTracks(trackMask), typeAnim)
+
+# Same, from the result of parseRangeFromTracks, for animations built on top of
+# strip notes (waterFall) that need the selection too: the mask is parsed once
+def createStripNotesFromSelection(selection, typeAnim):
+
+    listOfSelectedTrack, noteMin, noteMax, octaveCount, trackProcessed, tracksColor = selection
     tracks = glb.tracks
     
     # Create models Object
@@ -73,10 +80,12 @@ def createStripNotes(trackMask, typeAnim):
 
     # Parse tracks
     length = 0
+    tracksNoteData = computeTracksNoteData([tracks[trackIndex] for trackIndex in listOfSelectedTrack])
+    keyframes = KeyframeBuffer()
     for trackCount, trackIndex in enumerate(listOfSelectedTrack):
         track = tracks[trackIndex]
 
-        length = max(length, track.notes[-1].timeOff)
+        length = max(length, track.timeLastOff)
         offSetX = ((trackCount) * (cellSizeX + intervalX))
         intervalY = 0 # have something else to 0 create artefact in Y depending on how many note
         
@@ -85,10 +94,19 @@ def createStripNotes(trackMask, typeAnim):
 
         sizeX = cellSizeX
 
+        # Positions, sizes and frames of all notes computed at once
+        frames, levels = tracksNoteData[trackCount]
+        # One traversal of track.notes for the three attributes
+        noteNumbers, timeOn, timeOff = np.array(
+            [(note.noteNumber, note.timeOn, note.timeOff) for note in track.notes], dtype=np.float64
+        ).reshape(-1, 3).T
+        sizesY = np.round((timeOff - timeOn) * cellSizeY, 2)
+        positionsX = ((noteNumbers - noteMiddle) * (intervalTracks)) + offSetX # - (sizeX / 2)
+        positionsY = ((marginExtY + timeOn) * (cellSizeY + intervalY)) + (sizesY / 2)
+        positionsX, positionsY, sizesY = positionsX.tolist(), positionsY.tolist(), sizesY.tolist()
+
         for noteIndex, note in enumerate(track.notes):
-            posX = ((note.noteNumber - noteMiddle) * (intervalTracks)) + offSetX # - (sizeX / 2)
-            sizeY = round(((note.timeOff - note.timeOn) * cellSizeY),2)
-            posY = ((marginExtY + note.timeOn) * (cellSizeY + intervalY)) + (sizeY / 2)
+            posX, posY, sizeY = positionsX[noteIndex], positionsY[noteIndex], sizesY[noteIndex]
             nameOfNotePlayed = f"Note-{trackCount}-{note.noteNumber}-{noteIndex}"
 
             # Duplicate the existing note
@@ -100,10 +118,13 @@ def createStripNotes(trackMask, typeAnim):
             # Animate note
             # Be aware to animate duplicate only, never the model one
             # Pass the current note, previous note, and next note to the function
-            noteAnimate(noteObj, typeAnim, track, noteIndex, tracksColor[trackCount])
+            noteAnimate(noteObj, typeAnim, track, noteIndex, tracksColor[trackCount], keyframes, frames, levels)
             
         wLog(f"Notes Strip track {trackCount} - create & animate {noteIndex + 1}")
 
+    # One note per object, repeated notes share their action through NLA strips
+    keyframes.write(shareActions=True)
+
     # Create background plane
     planSizeX = (marginExtX * 2) + (notecount * cellSizeX) + (notecount * intervalTracks)
     planSizeY = (length + (marginExtY *2)) * cellSizeY
@@ -1,8 +1,13 @@
 from config.globals import *
 from config.config import bDat, bScn
-from animations.stripNotes import createStripNotes
+from animations.stripNotes import createStripNotesFromSelection
+from utils.animation import KeyframeBuffer
 from utils.stuff import wLog, parseRangeFromTracks
-from math import tan
+from math import tan, radians
+
+# Camera field of view (degrees) and tan of its half angle, computed once
+orthoFOV = 38.6
+tanHalfOrthoFOV = tan(radians(orthoFOV) / 2)
 
 """
 Creates a waterfall visualization of MIDI notes with animated camera movement.
@@ -32,31 +37,26 @@ def createWaterFall(trackMask, typeAnim):
     
     wLog("Create a waterfall Notes Animation type")
 
-    createStripNotes(trackMask, typeAnim)
+    # Track mask parsed once, for the strip notes and the camera
+    selection = parseRangeFromTracks(trackMask)
+    createStripNotesFromSelection(selection, typeAnim)
 
-    listOfSelectedTrack, noteMin, noteMax, octaveCount, tracksProcessed, tracksColor = parseRangeFromTracks(trackMask)
+    listOfSelectedTrack, noteMin, noteMax, octaveCount, tracksProcessed, tracksColor = selection
     tracks = glb.tracks
     fps = glb.fps
 
-    # Initialize a list to store all notes from the selected tracks along with their track index
-    selectedNotes = []
-
-    # Iterate through all tracks and collect notes from the selected tracks
-    for trackIndex, track in enumerate(tracks):
-        if trackIndex in listOfSelectedTrack:  # Check if the current track is selected
-            # Add each note as a tuple (trackIndex, note) to the list
-            selectedNotes.extend((trackIndex, note) for note in track.notes)
-
-    # Find the tuple with the note that has the smallest timeOn value
-    noteMinTimeOn = min(selectedNotes, key=lambda x: x[1].timeOn)
-    # Find the tuple with the note that has the largest timeOff value
-    noteMaxTimeOff = max(selectedNotes, key=lambda x: x[1].timeOff)
+    # First and last notes from the per track stats, no list of every selected note
+    # trackCount (position in the selection) as in stripNotes object names
+    selectedTracks = [tracks[trackIndex] for trackIndex in listOfSelectedTrack]
+    firstCount = min(range(len(selectedTracks)), key=lambda trackCount: selectedTracks[trackCount].timeFirstOn)
+    lastCount = max(range(len(selectedTracks)), key=lambda trackCount: selectedTracks[trackCount].timeLastOff)
+    firstTrack, lastTrack = selectedTracks[firstCount], selectedTracks[lastCount]
+    noteMinTimeOn = firstTrack.notes[firstTrack.firstNoteIndex]
+    noteMaxTimeOff = lastTrack.notes[lastTrack.lastNoteIndex]
 
     # Get first and last note object
-    noteIndex = tracks[noteMinTimeOn[0]].notes.index(noteMinTimeOn[1])
-    FirstNotePlayed = f"Note-{noteMinTimeOn[0]}-{noteMinTimeOn[1].noteNumber}-{noteIndex}"
-    noteIndex = tracks[noteMaxTimeOff[0]].notes.index(noteMaxTimeOff[1])
-    LastNotePlayed = f"Note-{noteMaxTimeOff[0]}-{noteMinTimeOn[1].noteNumber}-{noteIndex}"
+    FirstNotePlayed = f"Note-{firstCount}-{noteMinTimeOn.noteNumber}-{firstTrack.firstNoteIndex}"
+    LastNotePlayed = f"Note-{lastCount}-{noteMaxTimeOff.noteNumber}-{lastTrack.lastNoteIndex}"
     firstNote = bDat.objects[FirstNotePlayed]
     lastNote = bDat.objects[LastNotePlayed]
 
@@ -82,30 +82,23 @@ def createWaterFall(trackMask, typeAnim):
     cameraData.ortho_scale = sizeX # 90
 
     offSetYCamera = sizeX*(9/16)/2
-    orthoFOV = 38.6
 
-    CameraLocationZ = (sizeX/2) / (tan(orthoFOV/2))
+    CameraLocationZ = (sizeX/2) / tanHalfOrthoFOV
     
     # Set the initial position of the camera
     cameraObj.location = (0, offSetYCamera, CameraLocationZ)  # X, Y, Z
     cameraObj.rotation_euler = (0, 0, 0)  # Orientation
     cameraObj.data.shift_y = -0.01
 
-    # Add a keyframe for the starting Y position
-    cameraObj.location.y = offSetYCamera + firstNote.location.y - (firstNote.scale.y/2)
-    cameraObj.keyframe_insert(data_path="location", index=1, frame=noteMinTimeOn[1].timeOn*fps)
-
-    # Add a keyframe for the starting Y position
-    cameraObj.location.y = offSetYCamera + lastNote.location.y + (lastNote.scale.y/2)
-    cameraObj.keyframe_insert(data_path="location", index=1, frame=noteMaxTimeOff[1].timeOff*fps)
+    # Keyframes for the starting and ending Y position, linear animation
+    keyframes = KeyframeBuffer()
+    startY = offSetYCamera + firstNote.location.y - (firstNote.scale.y/2)
+    keyframes.insert(cameraObj, "location", noteMinTimeOn.timeOn*fps, startY, index=1)
+    endY = offSetYCamera + lastNote.location.y + (lastNote.scale.y/2)
+    keyframes.insert(cameraObj, "location", noteMaxTimeOff.timeOff*fps, endY, index=1)
+    keyframes.setInterpolation(cameraObj, "location", 'LINEAR', index=1)
+    keyframes.write()
+    cameraObj.location.y = startY
 
     # Set the active camera for the scene
     bScn.camera = cameraObj
-
-    # Make animation linear
-    action = cameraObj.animation_data.action  # Get animation action
-    fcurve = action.fcurves.find(data_path="location", index=1)  # F-Curve for Y axis
-
-    if fcurve:
-        for keyframe in fcurve.keyframe_points:
-            keyframe.interpolation = 'LINEAR'  # Set interpolation to 'LINEAR'
@@ -46,6 +46,12 @@ MIDI_CONFIG = {
     "current": "Greensleeves"
 }
 
+# Animation settings
+ANIMATION_CONFIG = {
+    # Skip notes lasting glb.resolutionLimit frames or less, not visible at render
+    "cullShortNotes": False,
+}
+
 from sys import platform
     
 def getFilesPaths():
@@ -3,6 +3,8 @@ Global state manager for M2B application using a singleton pattern.
 Provides centralized access to shared variables across all modules.
 """
 
+from math import ceil
+
 class globalState:
     """Singleton class to manage global state across M2B modules"""
     
@@ -14,6 +16,8 @@ class globalState:
         self._hiddenCollection = None
         self._lastNoteTimeOff = None
         self._fps = None
+        self._eventLenMove = None
+        self._resolutionLimit = None
         self._fLog = None
 
     @property
@@ -55,6 +59,19 @@ class globalState:
     @fps.setter
     def fps(self, value):
         self._fps = value
+        # Frames derived from fps, computed once here instead of for every note
+        self._eventLenMove = ceil(value * 0.1)
+        self._resolutionLimit = round(value * 0.2)
+
+    @property
+    def eventLenMove(self):
+        """Maximum length in frames of a note transition (0.1 sec)"""
+        return self._eventLenMove
+
+    @property
+    def resolutionLimit(self):
+        """Notes lasting this number of frames or less are hardly visible (0.2 sec)"""
+        return self._resolutionLimit
 
     @property
     def fLog(self):
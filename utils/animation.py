@@ -1,9 +1,264 @@
 
 from config.globals import *
-from config.config import bTyp
+from config.config import bDat, bTyp, ANIMATION_CONFIG
 from utils.stuff import wLog
-from math import ceil, sin, pi
+from math import pi
 from random import randint
+from functools import lru_cache
+import numpy as np
+
+"""
+Collect keyframes in memory and write them to F-Curves in one pass.
+
+keyframe_insert is a full RNA round trip per call (path resolution, sorted
+insertion in the F-Curve, depsgraph tag). Keyframes are stored here per
+(object, data path, index) and written with keyframe_points.add + foreach_set.
+
+Behaves like keyframe_insert: a keyframe inserted on an existing frame
+replaces its value, so the last insert for a frame wins.
+
+Usage:
+    keyframes = KeyframeBuffer()
+    keyframes.insert(obj, '["emissionStrength"]', frame, value)
+    ...
+    keyframes.write()
+
+Objects animated by a single note each (stripNotes) can share actions with
+write(shareActions=True), identical notes then use one action and NLA strips.
+
+setInterpolation sets the interpolation ('LINEAR', ...) of all the keyframes of
+a curve when written, in one foreach_set instead of one assignment per keyframe.
+"""
+class KeyframeBuffer:
+
+    def __init__(self):
+        self.curves = {}
+        self.lastValues = {}
+        self.interpolations = {}
+
+    def insert(self, owner, dataPath, frame, value, index=0):
+        key = (owner, dataPath, index)
+        curve = self.curves.get(key)
+        if curve is None:
+            curve = self.curves[key] = {}
+        curve[frame] = value
+        self.lastValues[key] = value
+
+    def setInterpolation(self, owner, dataPath, interpolation, index=0):
+        self.interpolations[(owner, dataPath, index)] = interpolation
+
+    # Last value inserted for a property, like reading it back after keyframe_insert
+    def value(self, owner, dataPath, default, index=0):
+        return self.lastValues.get((owner, dataPath, index), default)
+
+    def write(self, shareActions=False):
+        owners = {}
+        for (owner, dataPath, index), curve in self.curves.items():
+            owners.setdefault(owner, {})[(dataPath, index)] = curve
+
+        templates = {}
+        for owner, curves in owners.items():
+            if shareActions and owner.animation_data is None:
+                # Objects whose keyframes only differ by a time shift share one action,
+                # played by an NLA strip starting on the first frame
+                start = int(min(min(curve) for curve in curves.values()))
+                curves = {key: {frame - start: value for frame, value in curve.items()} for key, curve in curves.items()}
+                # same keyframes and same interpolations, keys are unique so interpolations are never compared
+                signature = tuple(sorted(
+                    (key, self.interpolations.get((owner, *key)), tuple(sorted(curve.items()))) for key, curve in curves.items()
+                ))
+                template = templates.get(signature)
+                if template is None:
+                    # shared by all the strips, named after none of their objects
+                    action = bDat.actions.new(name=f"M2B_NoteAction_{len(templates)}")
+                    fcurves, slot = actionFCurves(action, owner)
+                    template = templates[signature] = (action, slot)
+                    for (dataPath, index), curve in curves.items():
+                        writeFCurve(fcurves, dataPath, index, curve, self.interpolations.get((owner, dataPath, index)))
+                action, slot = template
+                nlaTrack = owner.animation_data_create().nla_tracks.new()
+                strip = nlaTrack.strips.new(action.name, start, action)
+                if slot is not None:
+                    strip.action_slot = slot
+                continue
+
+            animData = owner.animation_data or owner.animation_data_create()
+            if animData.action is None:
+                animData.action = bDat.actions.new(name=f"{owner.name}Action")
+            fcurves, slot = actionFCurves(animData.action, owner, getattr(animData, "action_slot", None))
+            if slot is not None:
+                animData.action_slot = slot
+            for (dataPath, index), curve in curves.items():
+                writeFCurve(fcurves, dataPath, index, curve, self.interpolations.get((owner, dataPath, index)))
+
+        self.curves.clear()
+        self.lastValues.clear()
+        self.interpolations.clear()
+
+"""
+F-Curves of an action for owner, with the action slot they belong to.
+
+Blender 4.4+ (slotted actions): the F-Curves are in the channelbag of a slot,
+the given slot or a new one for owner. Older versions: the F-Curves of the
+action itself, no slot (None).
+"""
+def actionFCurves(action, owner, slot=None):
+    if not hasattr(action, "layers"):
+        return action.fcurves, None
+    from bpy_extras.anim_utils import action_ensure_channelbag_for_slot
+    if slot is None:
+        slot = action.slots.new(id_type=owner.id_type, name=owner.name)
+    return action_ensure_channelbag_for_slot(action, slot).fcurves, slot
+
+"""
+Write keyframes {frame: value} to an F-Curve, created if needed, in fcurves
+(from actionFCurves). Existing keyframes are kept unless a new one is on the same frame.
+With interpolation ('LINEAR', ...), all keyframes of the F-Curve get it.
+"""
+def writeFCurve(fcurves, dataPath, index, curve, interpolation=None):
+    fcurve = fcurves.find(dataPath, index=index)
+    if fcurve is None:
+        fcurve = fcurves.new(dataPath, index=index)
+    elif len(fcurve.keyframe_points):
+        existing = np.empty(len(fcurve.keyframe_points) * 2, dtype=np.float32)
+        fcurve.keyframe_points.foreach_get("co", existing)
+        curve = {**dict(zip(existing[0::2].tolist(), existing[1::2].tolist())), **curve}
+        fcurve.keyframe_points.clear()
+
+    co = np.array(sorted(curve.items()), dtype=np.float32).ravel()
+    fcurve.keyframe_points.add(len(curve))
+    fcurve.keyframe_points.foreach_set("co", co)
+    if interpolation is not None:
+        # foreach_set takes the enum value, not its name
+        interpolationValue = bTyp.Keyframe.bl_rna.properties["interpolation"].enum_items[interpolation].value
+        fcurve.keyframe_points.foreach_set("interpolation", np.full(len(fcurve.keyframe_points), interpolationValue, dtype=np.int32))
+    fcurve.update()
+
+"""
+Compute the animation frames of all notes of a track in one numpy pass.
+
+Args:
+    track (MIDITrack): Track whose notes are animated
+
+Returns:
+    tuple: (frameT1, frameT2, frameT3, frameT4, skipped) lists, indexed like track.notes
+        skipped: True when the note is not animated, it starts before the previous
+        note of the same note number ends, or ends after the next one starts,
+        or it is culled as too short (ANIMATION_CONFIG["cullShortNotes"])
+
+Note:
+    Times stay in float64 so frames are the same as int(time * fps) per note
+"""
+def computeNoteFrames(track):
+    fps = glb.fps
+    count = len(track.notes)
+    timeOn = np.fromiter((note.timeOn for note in track.notes), dtype=np.float64, count=count)
+    timeOff = np.fromiter((note.timeOff for note in track.notes), dtype=np.float64, count=count)
+
+    eventLenMove = np.maximum(1, np.minimum(glb.eventLenMove, (timeOff - timeOn) * fps // 2))
+
+    frameTimeOn = (timeOn * fps).astype(np.int64)
+    frameNoteOff = (timeOff * fps).astype(np.int64)
+    frameTimeOff = np.maximum(frameTimeOn + 2, frameNoteOff)
+
+    # Previous / next note of the same note number are the neighbours in pitch order,
+    # one pass instead of scanning the track backward and forward for every note
+    order = np.array(noteIndexesByPitch(track), dtype=np.int64)
+    samePitch = np.fromiter((note.noteNumber for note in track.notes), dtype=np.int16, count=count)[order]
+    samePitch = samePitch[1:] == samePitch[:-1]
+    previousOff = frameTimeOn[order].copy()
+    previousOff[1:][samePitch] = frameNoteOff[order[:-1]][samePitch]
+    nextOn = frameTimeOff[order].copy()
+    nextOn[:-1][samePitch] = frameTimeOn[order[1:]][samePitch]
+    skipped = np.empty(count, dtype=bool)
+    skipped[order] = (frameTimeOn[order] < previousOff) | (frameTimeOff[order] > nextOn)
+
+    if ANIMATION_CONFIG["cullShortNotes"]:
+        skipped |= frameTimeOff - frameTimeOn <= glb.resolutionLimit
+
+    return (
+        frameTimeOn.tolist(),
+        (frameTimeOn + eventLenMove).tolist(),
+        (frameTimeOff - eventLenMove).tolist(),
+        frameTimeOff.tolist(),
+        skipped.tolist(),
+    )
+
+# Note on and note off frames of all notes of a track, indexed like track.notes,
+# same values as int(note.timeOn * fps) / int(note.timeOff * fps) per note
+def computeNoteOnOffFrames(track):
+    fps = glb.fps
+    count = len(track.notes)
+    timeOn = np.fromiter((note.timeOn for note in track.notes), dtype=np.float64, count=count)
+    timeOff = np.fromiter((note.timeOff for note in track.notes), dtype=np.float64, count=count)
+    return (timeOn * fps).astype(np.int64).tolist(), (timeOff * fps).astype(np.int64).tolist()
+
+# Socket identifiers of the SparklesCloud inputs by node group name
+sparklesCloudIdentifiers = {}
+
+"""
+Identifiers of the densityCloud and densitySeed inputs of the SparklesCloud modifier.
+The node group interface is searched once per node group, not for every note.
+"""
+def sparklesCloudInputs(obj):
+    nodeGroup = obj.modifiers["SparklesCloud"].node_group
+    identifiers = sparklesCloudIdentifiers.get(nodeGroup.name)
+    if identifiers is None:
+        itemsTree = nodeGroup.interface.items_tree
+        identifiers = (itemsTree["densityCloud"].identifier, itemsTree["densitySeed"].identifier)
+        sparklesCloudIdentifiers[nodeGroup.name] = identifiers
+    return identifiers
+
+"""
+Compute the velocity driven levels of all notes of a track in one numpy pass.
+
+Args:
+    track (MIDITrack): Track whose notes are animated
+
+Returns:
+    tuple: (brightness, velocityBlueToRed) lists, indexed like track.notes
+        brightness: sinusoidal emission strength from velocity
+        velocityBlueToRed: emission color from velocity with a quadratic ease in-out
+"""
+def computeNoteLevels(track):
+    velocity = np.fromiter((note.velocity for note in track.notes), dtype=np.float64, count=len(track.notes))
+
+    # Transform linear velocity (0-1) into sinusoidal brightness curve
+    brightness = 5 + (np.sin(velocity * pi/2) * 2)
+
+    adjustedVelocity = np.where(velocity < 0.5, 2 * (velocity ** 2), 1 - 2 * ((1 - velocity) ** 2))
+    velocityBlueToRed = 0.02 + (0.4 - 0.02) * adjustedVelocity
+
+    return brightness.tolist(), velocityBlueToRed.tolist()
+
+"""
+Compute frames and levels of several tracks, computed once before animating.
+
+Args:
+    tracks (list): MIDITrack list
+
+Returns:
+    list: (frames, levels) per track, in the same order as tracks
+"""
+def computeTracksNoteData(tracks):
+    return [(computeNoteFrames(track), computeNoteLevels(track)) for track in tracks]
+
+"""
+Indexes of the notes of a track grouped by note number, in time order inside a group.
+
+Animations with one object per note number iterate in this order, so all
+keyframes of an object are produced together instead of interleaved with
+every other object of the track.
+"""
+def noteIndexesByPitch(track):
+    noteNumbers = np.fromiter((note.noteNumber for note in track.notes), dtype=np.int16, count=len(track.notes))
+    return np.argsort(noteNumbers, kind="stable").tolist()
+
+# Animation types of a comma-separated typeAnim, split once per string
+# instead of once per note
+@lru_cache(maxsize=None)
+def splitAnimationTypes(typeAnim):
+    return tuple(animationType.strip() for animationType in typeAnim.split(','))
 
 """
 Animate a Blender object based on MIDI note events and animation type.
@@ -18,9 +273,10 @@ Parameters:
     Obj (bpy.types.Object): Blender object to animate
     typeAnim (str): Animation style(s), comma-separated
     note (MIDINote): Current note to process
-    previousNote (MIDINote): Previous note in sequence
-    nextNote (MIDINote): Next note in sequence
     colorTrack (float): Color value for track (0.0-1.0)
+    keyframes (KeyframeBuffer): Buffer receiving the keyframes, written by the caller
+    frames (tuple): Frames of the track notes, from computeNoteFrames
+    levels (tuple): Brightness and colors of the track notes, from computeNoteLevels
 
 Animation Timing:
     - frameT1: Note start
@@ -38,51 +294,28 @@ Properties Animated:
 Returns:
     None
 """
-def noteAnimate(obj, typeAnim, track, noteIndex, colorTrack):
+def noteAnimate(obj, typeAnim, track, noteIndex, colorTrack, keyframes, frames, levels):
 
-    fps = glb.fps
     note = track.notes[noteIndex]
 
-    # Find the previous note with the same note number
-    previousNote = None
-    for prevIndex in range(noteIndex - 1, -1, -1):
-        if track.notes[prevIndex].noteNumber == note.noteNumber:
-            previousNote = track.notes[prevIndex]
-            break
-
-    # Find the next note with the same note number
-    nextNote = None
-    for nextIndex in range(noteIndex + 1, len(track.notes)):
-        if track.notes[nextIndex].noteNumber == note.noteNumber:
-            nextNote = track.notes[nextIndex]
-            break
-
-    eventLenMove = max(1, min(ceil(fps * 0.1), (note.timeOff - note.timeOn) * fps // 2))
-
-    frameTimeOn = int(note.timeOn * fps)
-    frameTimeOff = max(frameTimeOn + 2, int(note.timeOff * fps))
-
-    frameT1, frameT2 = frameTimeOn, frameTimeOn + eventLenMove
-    frameT3, frameT4 = frameTimeOff - eventLenMove, frameTimeOff
-
-    frameTimeOffPrevious = int(previousNote.timeOff * fps) if previousNote else frameTimeOn
-    frameTimeOnNext = int(nextNote.timeOn * fps) if nextNote else frameTimeOff
-    
-    if frameTimeOn < frameTimeOffPrevious or frameTimeOff > frameTimeOnNext:
+    # Overlapping or culled note, see computeNoteFrames
+    if frames[4][noteIndex]:
         return
+
+    frameT1, frameT2 = frames[0][noteIndex], frames[1][noteIndex]
+    frameT3, frameT4 = frames[2][noteIndex], frames[3][noteIndex]
     
-    # Transform linear velocity (0-1) into sinusoidal brightness curve
-    brightness = 5 + (sin(note.velocity * pi/2) * 2)
+    brightness = levels[0][noteIndex]
 
     # List of keyframes to animate
-    keyframes = []
+    noteKeyframes = []
 
     # Handle different animation types
-    for animation_type in typeAnim.split(','):
-        match animation_type.strip():
+    for animation_type in splitAnimationTypes(typeAnim):
+        match animation_type:
             case "ZScale":
                 velocity = 3 * note.velocity
-                keyframes.extend([
+                noteKeyframes.extend([
                     (frameT1, "scale", (None, None, 1)),
                     (frameT1, "location", (None, None, 0)),
                     (frameT2, "scale", (None, None, velocity)),
@@ -94,9 +327,8 @@ def noteAnimate(obj, typeAnim, track, noteIndex, colorTrack):
                 ])
             
             case "B2R-Light":
-                adjustedVelocity = 2 * (note.velocity ** 2) if note.velocity < 0.5 else 1 - 2 * ((1 - note.velocity) ** 2)
-                velocityBlueToRed = 0.02 + (0.4 - 0.02) * adjustedVelocity
-                keyframes.extend([
+                velocityBlueToRed = levels[1][noteIndex]
+                noteKeyframes.extend([
                     (frameT1, "emissionColor", velocityBlueToRed),
                     (frameT1, "emissionStrength", 0.0),
                     (frameT2, "emissionColor", velocityBlueToRed),
@@ -109,9 +341,10 @@ def noteAnimate(obj, typeAnim, track, noteIndex, colorTrack):
             
             case "MultiLight":
                 # If the object has an emission color from another track, average it
-                if obj["emissionColor"] > 0.01:
-                    colorTrack = (obj["emissionColor"] + colorTrack) / 2
-                keyframes.extend([
+                emissionColor = keyframes.value(obj, '["emissionColor"]', obj["emissionColor"])
+                if emissionColor > 0.01:
+                    colorTrack = (emissionColor + colorTrack) / 2
+                noteKeyframes.extend([
                     (frameT1, "emissionColor", colorTrack),
                     (frameT2, "emissionColor", colorTrack),
                     (frameT3, "emissionColor", colorTrack),
@@ -126,10 +359,9 @@ def noteAnimate(obj, typeAnim, track, noteIndex, colorTrack):
             case "Spread":
                 posZ = note.velocity * 30
                 radius = min((frameT4 - frameT1) // 2, 5)
-                densityCloud = obj.modifiers["SparklesCloud"].node_group.interface.items_tree["densityCloud"].identifier
-                densitySeed = obj.modifiers["SparklesCloud"].node_group.interface.items_tree["densitySeed"].identifier
+                densityCloud, densitySeed = sparklesCloudInputs(obj)
                 
-                keyframes.extend([
+                noteKeyframes.extend([
                     (frameT1, "location", (None, None, posZ)),
                     (frameT1, "scale", (0, 0, 0)),
                     (frameT1, "emissionStrength", 0),
@@ -146,40 +378,30 @@ def noteAnimate(obj, typeAnim, track, noteIndex, colorTrack):
                 wLog(f"Unknown animation type: {animation_type}")
     
     # noteStatus animation
-    keyframes.extend([
+    noteKeyframes.extend([
         (frameT1, "noteStatus", 0.0),
         (frameT2, "noteStatus", note.velocity),
         (frameT3, "noteStatus", note.velocity),
         (frameT4, "noteStatus", 0.0),
     ])
 
-    keyframes.sort(key=lambda x: (x[0], x[1]))
+    noteKeyframes.sort(key=lambda x: (x[0], x[1]))
     
-    for frame, data_path, value in keyframes:
+    insert = keyframes.insert
+    for frame, data_path, value in noteKeyframes:
         if isinstance(value, tuple):
             # Handle vector properties (location, scale)
             for i, v in enumerate(value):
                 if v is not None:
-                    val = getattr(obj, data_path) # Get vector value
-                    val[i] = v  # set value with index i (0=x, 1=y, 2=z)
-                    setattr(obj, data_path, val)  # Apply change
-                    obj.keyframe_insert(data_path=f"{data_path}", index=i, frame=frame)
+                    insert(obj, data_path, frame, v, index=i)
+        elif data_path.startswith('modifiers'):
+            # Handle modifier properties
+            modDataPath = data_path.split('.')[1]
+            modDataIndex = data_path.split('.')[2]
+            insert(obj, f'modifiers["{modDataPath}"]["{modDataIndex}"]', frame, value)
         else:
-            # Handle custom properties with proper data path
-            if data_path in ["noteStatus","emissionColor", "emissionStrength"]:
-                obj[data_path] = value
-                obj.keyframe_insert(data_path=f'["{data_path}"]', frame=frame)
-            elif data_path.startswith('modifiers'):
-                # Handle modifier properties
-                modDataPath = data_path.split('.')[1]
-                modDataIndex = data_path.split('.')[2]
-                obj.modifiers[modDataPath][modDataIndex] = value
-                data_path = f'modifiers["{modDataPath}"]["{modDataIndex}"]'
-                obj.keyframe_insert(data_path=data_path, frame=frame)
-            else:
-                # Handle regular properties
-                obj[data_path] = value
-                obj.keyframe_insert(data_path=data_path, frame=frame)
+            # Handle custom properties (noteStatus, emissionColor, emissionStrength)
+            insert(obj, f'["{data_path}"]', frame, value)
 
 
 """
@@ -236,14 +458,9 @@ def animCircleCurve(curve, rotationSpeed):
     endFrame = int(glb.lastNoteTimeOff * glb.fps)  # Use global lastNoteTimeOff
     totalRotations = rotationSpeed * glb.lastNoteTimeOff
 
-    # Set keyframes for Z rotation
-    curve.rotation_euler.z = 0
-    curve.keyframe_insert(data_path="rotation_euler", index=2, frame=startFrame)
-
-    curve.rotation_euler.z = totalRotations * 2 * pi  # Convert to radians
-    curve.keyframe_insert(data_path="rotation_euler", index=2, frame=endFrame)
-
-    # Make animation linear
-    for fcurve in curve.animation_data.action.fcurves:
-        for keyframe in fcurve.keyframe_points:
-            keyframe.interpolation = 'LINEAR'
+    # Set keyframes for Z rotation, linear animation
+    keyframes = KeyframeBuffer()
+    keyframes.insert(curve, "rotation_euler", startFrame, 0, index=2)
+    keyframes.insert(curve, "rotation_euler", endFrame, totalRotations * 2 * pi, index=2)  # Convert to radians
+    keyframes.setInterpolation(curve, "rotation_euler", 'LINEAR', index=2)
+    keyframes.write()
@@ -19,8 +19,10 @@ def deleteCollectionRecursive(collection):
         deleteCollectionRecursive(child)
 
     # Then delete all objects in this collection
-    for obj in collection.objects:
-        bDat.objects.remove(obj, do_unlink=True)
+    # list() as objects are removed while iterating, remove bound once
+    removeObject = bDat.objects.remove
+    for obj in list(collection.objects):
+        removeObject(obj, do_unlink=True)
 
     # Finally remove the collection itself
     bDat.collections.remove(collection)
@@ -58,9 +60,11 @@ def moveToCollection(collection, obj):
     None
     """
     # First move object to new collection
-    collect_to_unlink = findCollection(bCon, obj)
+    # an object created with bDat is not linked to any collection yet
+    collect_to_unlink = findCollection(bCon, obj) if obj.users_collection else None
     collection.objects.link(obj)
-    collect_to_unlink.objects.unlink(obj)
+    if collect_to_unlink:
+        collect_to_unlink.objects.unlink(obj)
 
     # Then set parent if _MasterLocation exists
     master_loc_name = f"{collection.name}_MasterLocation"
@@ -94,9 +98,10 @@ def createCollection(colName, colParent, emptyLocMaster=True):
 
     if emptyLocMaster:
         # create an empty axis to be parent for all objects in the collection
-        bOps.object.empty_add(type='PLAIN_AXES', location=(0, 0, 0))
-        empty = bCon.active_object
-        empty.name = f"{colName}_MasterLocation"
+        # bDat instead of bOps, no operator call and no scene update for each collection
+        empty = bDat.objects.new(f"{colName}_MasterLocation", None)
+        empty.empty_display_type = 'PLAIN_AXES'
+        glb.masterLocCollection.objects.link(empty)
 
         # Check if parent collection has an empty and set parent
         parent_empty_name = f"{colParent.name}_MasterLocation"
@@ -104,8 +109,6 @@ def createCollection(colName, colParent, emptyLocMaster=True):
         if parent_empty_name in glb.masterLocCollection.objects:
             empty.parent = glb.masterLocCollection.objects[parent_empty_name]
 
-        moveToCollection(glb.masterLocCollection, empty)
-
     return newCollection
 
 
@@ -126,6 +129,12 @@ Purge all orphaned (unused) data in the current Blender file.
 This includes unused objects, materials, textures, collections, particles, etc.
 """
 def purgeUnusedDatas():
+    # Blender's own recursive purge, all data types in one call
+    if hasattr(bDat, "orphans_purge"):
+        purgedItems = bDat.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+        wLog(f"Purging complete. {purgedItems} orphaned data cleaned up.")
+        return
+
     purgedItems = 0
     dataCategories = [
         bDat.objects, bDat.curves, bDat.meshes, bDat.materials,
@@ -133,11 +142,13 @@ def purgeUnusedDatas():
         bDat.actions, bDat.collections, bDat.sounds
     ]
     
+    # One batch_remove per category instead of one remove per item.
+    # Categories stay in order: removing objects can orphan meshes, materials, ...
     for dataBlock in dataCategories:
-        for item in list(dataBlock):  # Use list() to avoid modifying during iteration
-            if not item.users:
-                dataBlock.remove(item)
-                purgedItems += 1
+        orphans = [item for item in dataBlock if not item.users]
+        if orphans:
+            bDat.batch_remove(ids=orphans)
+            purgedItems += len(orphans)
     
     wLog(f"Purging complete. {purgedItems} orphaned data cleaned up.")
 
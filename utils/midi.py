@@ -14,6 +14,47 @@ Somes Fix:
 """
 
 from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from enum import IntEnum
+from struct import Struct
+from bisect import bisect_left
+import numpy as np
+
+# Interpolations known by kind are evaluated exactly on whole arrays at once,
+# any other callable is still accepted and approximated, see interpolate
+class InterpolationKind(IntEnum):
+    LINEAR = 0
+    EASE_IN = 1
+    EASE_OUT = 2
+    SMOOTHSTEP = 3
+
+interpolationFunctions = (
+    lambda x: x,
+    lambda x: x * x,
+    lambda x: 1 - (1 - x) ** 2,
+    lambda x: x * x * (3 - 2 * x),
+)
+
+interpolationSamples = np.linspace(0.0, 1.0, 1024)
+
+# Lookup table of a callable sampled on [0, 1], the few most recent callables
+# are kept: a new lambda on every call does not make the cache grow
+@lru_cache(maxsize=32)
+def sampleInterpolation(interpolation):
+    return np.fromiter((interpolation(x) for x in interpolationSamples.tolist()), dtype=np.float64, count=len(interpolationSamples))
+
+"""
+Evaluate an interpolation on an array of x in [0, 1].
+
+An InterpolationKind is evaluated exactly. Any other callable is sampled once
+at 1024 points on [0, 1] (sampleInterpolation), then read with np.interp instead of
+one Python call per note: its values are a piecewise-linear approximation of
+the callable, not its exact values.
+"""
+def interpolate(interpolation, x):
+    if isinstance(interpolation, int):
+        return interpolationFunctions[interpolation](x)
+    return np.interp(x, interpolationSamples, sampleInterpolation(interpolation))
 
 def evaluateEnvelope(time, timeOn, timeOff, attackTime, attackInterpolation, decayTime, decayInterpolation, sustainLevel):
     # find either point in time for envelope or where in envelope the timeOff happened
@@ -33,7 +74,49 @@ def evaluateEnvelope(time, timeOn, timeOff, attackTime, attackInterpolation, dec
 
     return sustainLevel
 
-@dataclass
+# Vectorized evaluateEnvelope, timeOn and timeOff are arrays
+def evaluateEnvelopes(time, timeOn, timeOff, attackTime, attackInterpolation, decayTime, decayInterpolation, sustainLevel):
+    relativeTime = np.minimum(time, timeOff) - timeOn
+    values = np.full(len(relativeTime), sustainLevel, dtype=np.float64)
+
+    # interpolations are only evaluated for a phase some note is in,
+    # notes all in sustain (the longest phase) need none
+    started = relativeTime > 0.0
+    attack = started & (relativeTime < attackTime)
+    if attack.any():
+        values[attack] = interpolate(attackInterpolation, relativeTime[attack] / attackTime)
+
+    relativeTime = relativeTime - attackTime
+    decay = started & ~attack & (relativeTime < decayTime)
+    if decay.any():
+        decayNormalized = interpolate(decayInterpolation, 1 - relativeTime[decay] / decayTime)
+        values[decay] = decayNormalized * (1 - sustainLevel) + sustainLevel
+
+    values[~started] = 0.0
+    return values
+
+# Vectorized MIDINote.evaluate, timeOn, timeOff and velocity are arrays of the notes
+def evaluateNotes(timeOn, timeOff, velocity, time, attackTime, attackInterpolation, decayTime, decayInterpolation, sustainLevel,
+    releaseTime, releaseInterpolation, velocitySensitivity):
+
+    values = evaluateEnvelopes(time, timeOn, timeOff, attackTime, attackInterpolation, decayTime, decayInterpolation, sustainLevel)
+
+    # time is a scalar, or an array with one time per note (evaluateTimeline)
+    released = time > timeOff
+    if released.any():
+        values[released] *= interpolate(releaseInterpolation, 1 - ((time - timeOff)[released] / releaseTime))
+
+    return (1 - velocitySensitivity) * values + velocitySensitivity * velocity * values
+
+# First of the notes [0:started] still sounding at time (release included).
+# timesOffMax is the running max of timesOff in timeOn order: every note before
+# the returned index has ended more than releaseTime ago. Bisected on
+# timeOff + releaseTime, the same float test as the masks, so no note is lost.
+def firstSounding(timesOffMax, time, releaseTime, started):
+    return bisect_left(timesOffMax, time, 0, started, key=lambda timeOff: timeOff + releaseTime)
+
+# slots, one note per NoteOff, no per instance __dict__ (Blender Python >= 3.10)
+@dataclass(slots=True)
 class MIDINote:
     channel: int = 0
     noteNumber: int = 0
@@ -57,7 +140,7 @@ class MIDINote:
 
 from typing import List
 
-@dataclass
+@dataclass(slots=True)
 class MIDITrackUsed:
     trackIndex: int = 0
     name: str = ""
@@ -73,265 +156,251 @@ class MIDITrack:
     notes: List[MIDINote] = field(default_factory = list)
     notesUsed: List[int] = field(default_factory = list)
 
+    # Notes as arrays (structure of arrays) sorted by timeOn, for evaluate / evaluateAll
+    # notes itself keeps its order (NoteOff order), animations rely on it
+    # Channels and note numbers fit in uint8 (0..15, 0..127).
+    # Times and velocities stay float64 to give the same values as MIDINote.evaluate
+    def __post_init__(self):
+        count = len(self.notes)
+        timesOn = np.fromiter((note.timeOn for note in self.notes), dtype=np.float64, count=count)
+        order = np.argsort(timesOn, kind="stable")
+        self.timesOn = timesOn[order]
+        self.channels = np.fromiter((note.channel for note in self.notes), dtype=np.uint8, count=count)[order]
+        self.noteNumbers = np.fromiter((note.noteNumber for note in self.notes), dtype=np.uint8, count=count)[order]
+        timesOff = np.fromiter((note.timeOff for note in self.notes), dtype=np.float64, count=count)
+        self.timesOff = timesOff[order]
+        self.velocities = np.fromiter((note.velocity for note in self.notes), dtype=np.float64, count=count)[order]
+        # Track stats computed once: first note to start and last note to end,
+        # indexes in notes (first of ties, like min / max), and their times
+        self.firstNoteIndex = int(order[0]) if count else None
+        self.lastNoteIndex = int(np.argmax(timesOff)) if count else None
+        self.timeFirstOn = float(self.timesOn[0]) if count else 0.0
+        self.timeLastOff = float(timesOff[self.lastNoteIndex]) if count else 0.0
+        # Same arrays split by (channel, noteNumber), still sorted by timeOn, for evaluate
+        keys = self.channels.astype(np.int64) * 128 + self.noteNumbers
+        keyOrder = np.argsort(keys, kind="stable")
+        uniqueKeys, starts = np.unique(keys[keyOrder], return_index=True)
+        self.notesByChannelNote = {}
+        for key, indexes in zip(uniqueKeys.tolist(), np.split(keyOrder, starts[1:])):
+            timesOff = self.timesOff[indexes]
+            self.notesByChannelNote[divmod(key, 128)] = (self.timesOn[indexes], timesOff, self.velocities[indexes], np.maximum.accumulate(timesOff))
+        # Running max of timesOff in timeOn order, see firstSounding
+        self.timesOffMax = np.maximum.accumulate(self.timesOff)
+
+    # Notes of a channel sounding at time (release included), as a mask over the
+    # notes first:started: notes starting after time or all ended before are never looked at
+    def activeMask(self, time, channel, releaseTime):
+        started = int(np.searchsorted(self.timesOn, time, side="right"))
+        first = firstSounding(self.timesOffMax, time, releaseTime, started)
+        mask = (self.channels[first:started] == channel) & (self.timesOff[first:started] + releaseTime >= time)
+        return first, started, mask
+
     def evaluate(self, time, channel, noteNumber, 
         attackTime, attackInterpolation, decayTime, decayInterpolation, sustainLevel, 
         releaseTime, releaseInterpolation, velocitySensitivity):
 
-        noteFilter = lambda note: note.channel == channel and note.noteNumber == noteNumber
-        timeFilter = lambda note: note.timeOff + releaseTime >= time >= note.timeOn
-        filteredNotes = filter(lambda note: noteFilter(note) and timeFilter(note), self.notes)
+        # only the notes of this (channel, noteNumber) are looked at
+        bucket = self.notesByChannelNote.get((channel, noteNumber))
+        if bucket is None:
+            return 0.0
+        timesOn, timesOff, velocities, timesOffMax = bucket
+        started = int(np.searchsorted(timesOn, time, side="right"))
+        first = firstSounding(timesOffMax, time, releaseTime, started)
+        mask = timesOff[first:started] + releaseTime >= time
+        if not mask.any():
+            return 0.0
         arguments = (time, attackTime, attackInterpolation, decayTime, decayInterpolation, 
             sustainLevel, releaseTime, releaseInterpolation, velocitySensitivity)
-        return max((note.evaluate(*arguments) for note in filteredNotes), default = 0.0)
+        values = evaluateNotes(timesOn[first:started][mask], timesOff[first:started][mask], velocities[first:started][mask], *arguments)
+        return float(values.max())
+
+    # evaluate for an array of times (a whole timeline) in one call: every
+    # (time, note) pair of the (channel, noteNumber) notes is evaluated at once
+    def evaluateTimeline(self, times, channel, noteNumber,
+        attackTime, attackInterpolation, decayTime, decayInterpolation, sustainLevel,
+        releaseTime, releaseInterpolation, velocitySensitivity):
+
+        times = np.asarray(times, dtype=np.float64)
+        bucket = self.notesByChannelNote.get((channel, noteNumber))
+        if bucket is None:
+            return np.zeros(len(times))
+        timesOn, timesOff, velocities, timesOffMax = bucket
+        noteCount = len(timesOn)
+        timeGrid = np.repeat(times, noteCount)
+        timesOn, timesOff, velocities = np.tile(timesOn, len(times)), np.tile(timesOff, len(times)), np.tile(velocities, len(times))
+        # pairs evaluate skips: note not started yet or released for more than releaseTime
+        active = (timesOn <= timeGrid) & (timesOff + releaseTime >= timeGrid)
+        arguments = (attackTime, attackInterpolation, decayTime, decayInterpolation,
+            sustainLevel, releaseTime, releaseInterpolation, velocitySensitivity)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = evaluateNotes(timesOn, timesOff, velocities, timeGrid, *arguments)
+        values = np.where(active, values, -np.inf).reshape(len(times), noteCount).max(axis=1)
+        values[values == -np.inf] = 0.0
+        return values
 
     def evaluateAll(self, time, channel, 
         attackTime, attackInterpolation, decayTime, decayInterpolation, sustainLevel,
         releaseTime, releaseInterpolation, velocitySensitivity):
-        channelFilter = lambda note: note.channel == channel
-        timeFilter = lambda note: note.timeOff + releaseTime >= time >= note.timeOn
-        filteredNotes = list(filter(lambda note: channelFilter(note) and timeFilter(note), self.notes))
+        first, started, mask = self.activeMask(time, channel, releaseTime)
+        # no note sounding, nothing to evaluate
+        if not mask.any():
+            return [0.0] * 128
         arguments = (time, attackTime, attackInterpolation, decayTime, decayInterpolation, 
             sustainLevel, releaseTime, releaseInterpolation, velocitySensitivity)
-        noteValues = []
-        for i in range(128):
-            filteredByNumberNotes = filter(lambda note: note.noteNumber == i, filteredNotes)
-            value = max((note.evaluate(*arguments) for note in filteredByNumberNotes), default = 0.0)
-            noteValues.append(value)
-        return noteValues
+        values = evaluateNotes(self.timesOn[first:started][mask], self.timesOff[first:started][mask], self.velocities[first:started][mask], *arguments)
+        # single pass over the active notes: max by note number,
+        # -inf marks note numbers without active note
+        noteValues = np.full(128, -np.inf)
+        np.maximum.at(noteValues, self.noteNumbers[first:started][mask], values)
+        noteValues[noteValues == -np.inf] = 0.0
+        return noteValues.tolist()
 
     def copy(self):
         return MIDITrack(self.name, self.index, self.minNote, self.maxNote, [n.copy() for n in self.notes])
 
-import struct
-
-# Channel events
-@dataclass
-class NoteOnEvent:
-    deltaTime: int
-    channel: int
-    note: int
-    velocity: int
-
-    @classmethod
-    def fromMemoryMap(cls, deltaTime, channel, memoryMap):
-        note = struct.unpack("B", memoryMap.read(1))[0]
-        velocity = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, channel, note, velocity)
-
-@dataclass
-class NoteOffEvent:
-    deltaTime: int
-    channel: int
-    note: int
-    velocity: int
-
-    @classmethod
-    def fromMemoryMap(cls, deltaTime, channel, memoryMap):
-        note = struct.unpack("B", memoryMap.read(1))[0]
-        velocity = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, channel, note, velocity)
-
-@dataclass
-class NotePressureEvent:
-    deltaTime: int
-    channel: int
-    note: int
-    pressure: int
-
-    @classmethod
-    def fromMemoryMap(cls, deltaTime, channel, memoryMap):
-        note = struct.unpack("B", memoryMap.read(1))[0]
-        pressure = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, channel, note, pressure)
+# Meta events are decoded from the raw bytes of the file with an integer cursor:
+# data[position] is already an int, no struct.unpack or file read per byte.
+# Each fromBytes returns the event and the position following it.
+# Events are never modified once parsed: slots and frozen, no per instance __dict__.
+# Channel and SysEx events are never turned into objects, see parseColumns.
 
-@dataclass
-class ControllerEvent:
-    deltaTime: int
-    channel: int
-    controller: int
-    value: int
-
-    @classmethod
-    def fromMemoryMap(cls, deltaTime, channel, memoryMap):
-        controller = struct.unpack("B", memoryMap.read(1))[0]
-        value = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, channel, controller, value)
-
-@dataclass
-class ProgramEvent:
-    deltaTime: int
-    channel: int
-    program: int
-
-    @classmethod
-    def fromMemoryMap(cls, deltaTime, channel, memoryMap):
-        program = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, channel, program)
-
-@dataclass
-class ChannelPressureEvent:
-    deltaTime: int
-    channel: int
-    pressure: int
-
-    @classmethod
-    def fromMemoryMap(cls, deltaTime, channel, memoryMap):
-        pressure = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, channel, pressure)
-
-@dataclass
-class PitchBendEvent:
-    deltaTime: int
-    channel: int
-    lsb: int
-    msb: int
-
-    @classmethod
-    def fromMemoryMap(cls, deltaTime, channel, memoryMap):
-        lsb = struct.unpack("B", memoryMap.read(1))[0]
-        msb = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, channel, lsb, msb)
-
-# Only track events
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SequenceNumberEvent:
     deltaTime: int
     sequenceNumber: int
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        sequenceNumber = struct.unpack(">H", memoryMap.read(2))[0]
-        return cls(deltaTime, sequenceNumber)
+    def fromBytes(cls, deltaTime, length, data, position):
+        sequenceNumber = (data[position] << 8) | data[position + 1]
+        return cls(deltaTime, sequenceNumber), position + 2
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TextEvent:
     deltaTime: int
     text: str
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        text = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin-1")
-        return cls(deltaTime, text)
+    def fromBytes(cls, deltaTime, length, data, position):
+        text = data[position:position + length].decode("latin-1")
+        return cls(deltaTime, text), position + length
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CopyrightEvent:
     deltaTime: int
     copyright: str
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        copyright = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin-1")
-        return cls(deltaTime, copyright)
+    def fromBytes(cls, deltaTime, length, data, position):
+        copyright = data[position:position + length].decode("latin-1")
+        return cls(deltaTime, copyright), position + length
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TrackNameEvent:
     deltaTime: int
     name: str
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        name = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin-1")
-        return cls(deltaTime, name)
+    def fromBytes(cls, deltaTime, length, data, position):
+        name = data[position:position + length].decode("latin-1")
+        return cls(deltaTime, name), position + length
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class InstrumentNameEvent:
     deltaTime: int
     name: str
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        name = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin-1")
-        return cls(deltaTime, name)
+    def fromBytes(cls, deltaTime, length, data, position):
+        name = data[position:position + length].decode("latin-1")
+        return cls(deltaTime, name), position + length
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LyricEvent:
     deltaTime: int
     lyric: str
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        lyric = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin-1")
-        return cls(deltaTime, lyric)
+    def fromBytes(cls, deltaTime, length, data, position):
+        lyric = data[position:position + length].decode("latin-1")
+        return cls(deltaTime, lyric), position + length
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MarkerEvent:
     deltaTime: int
     marker: str
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        marker = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin-1")
-        return cls(deltaTime, marker)
+    def fromBytes(cls, deltaTime, length, data, position):
+        marker = data[position:position + length].decode("latin-1")
+        return cls(deltaTime, marker), position + length
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CuePointEvent:
     deltaTime: int
     cuePoint: str
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        cuePoint = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin-1")
-        return cls(deltaTime, cuePoint)
+    def fromBytes(cls, deltaTime, length, data, position):
+        cuePoint = data[position:position + length].decode("latin-1")
+        return cls(deltaTime, cuePoint), position + length
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ProgramNameEvent:
     deltaTime: int
     name: str
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        name = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin-1")
-        return cls(deltaTime, name)
+    def fromBytes(cls, deltaTime, length, data, position):
+        name = data[position:position + length].decode("latin-1")
+        return cls(deltaTime, name), position + length
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DeviceNameEvent:
     deltaTime: int
     name: str
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        name = struct.unpack(f"{length}s", memoryMap.read(length))[0].decode("latin-1")
-        return cls(deltaTime, name)
+    def fromBytes(cls, deltaTime, length, data, position):
+        name = data[position:position + length].decode("latin-1")
+        return cls(deltaTime, name), position + length
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MidiChannelPrefixEvent:
     deltaTime: int
     prefix: int
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        prefix = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, prefix)
+    def fromBytes(cls, deltaTime, length, data, position):
+        return cls(deltaTime, data[position]), position + 1
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MidiPortEvent:
     deltaTime: int
     port: int
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        port = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, port)
+    def fromBytes(cls, deltaTime, length, data, position):
+        return cls(deltaTime, data[position]), position + 1
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EndOfTrackEvent:
     deltaTime: int
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        return cls(deltaTime)
+    def fromBytes(cls, deltaTime, length, data, position):
+        return cls(deltaTime), position
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TempoEvent:
     deltaTime: int
     tempo: int
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        tempo = struct.unpack(">I", b"\x00" + memoryMap.read(3))[0]
-        return cls(deltaTime, tempo)
+    def fromBytes(cls, deltaTime, length, data, position):
+        tempo = (data[position] << 16) | (data[position + 1] << 8) | data[position + 2]
+        return cls(deltaTime, tempo), position + 3
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SmpteOffsetEvent:
     deltaTime: int
     hours: int
@@ -341,15 +410,11 @@ class SmpteOffsetEvent:
     fractionalFrames: int
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        hours = struct.unpack("B", memoryMap.read(1))[0]
-        minutes = struct.unpack("B", memoryMap.read(1))[0]
-        seconds = struct.unpack("B", memoryMap.read(1))[0]
-        fps = struct.unpack("B", memoryMap.read(1))[0]
-        fractionalFrames = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, hours, minutes, seconds, fps, fractionalFrames)
+    def fromBytes(cls, deltaTime, length, data, position):
+        hours, minutes, seconds, fps, fractionalFrames = data[position:position + 5]
+        return cls(deltaTime, hours, minutes, seconds, fps, fractionalFrames), position + 5
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TimeSignatureEvent:
     deltaTime: int
     numerator: int
@@ -358,57 +423,28 @@ class TimeSignatureEvent:
     thirtySecondPer24Clocks: int
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        numerator = struct.unpack("B", memoryMap.read(1))[0]
-        denominator = struct.unpack("B", memoryMap.read(1))[0]
-        clocksPerClick = struct.unpack("B", memoryMap.read(1))[0]
-        thirtySecondPer24Clocks = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, numerator, denominator, clocksPerClick, thirtySecondPer24Clocks)
+    def fromBytes(cls, deltaTime, length, data, position):
+        numerator, denominator, clocksPerClick, thirtySecondPer24Clocks = data[position:position + 4]
+        return cls(deltaTime, numerator, denominator, clocksPerClick, thirtySecondPer24Clocks), position + 4
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class KeySignatureEvent:
     deltaTime: int
     flatsSharps: int
     majorMinor: int
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        flatsSharps = struct.unpack("B", memoryMap.read(1))[0]
-        majorMinor = struct.unpack("B", memoryMap.read(1))[0]
-        return cls(deltaTime, flatsSharps, majorMinor)
+    def fromBytes(cls, deltaTime, length, data, position):
+        return cls(deltaTime, data[position], data[position + 1]), position + 2
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SequencerEvent:
     deltaTime: int
     data: bytes
 
     @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        data = struct.unpack(f"{length}s", memoryMap.read(length))[0]
-        return cls(deltaTime, data)
-
-@dataclass
-class SysExEvent:
-    deltaTime: int
-    data: bytes
-
-    @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        data = struct.unpack(f"{length}s", memoryMap.read(length))[0]
-        return cls(deltaTime, data)
-
-@dataclass
-class EscapeSequenceEvent:
-    deltaTime: int
-    data: bytes
-
-    @classmethod
-    def fromMemoryMap(cls, deltaTime, length, memoryMap):
-        data = struct.unpack(f"{length}s", memoryMap.read(length))[0]
-        return cls(deltaTime, data)
-
-import mmap
-from os import SEEK_CUR
+    def fromBytes(cls, deltaTime, length, data, position):
+        return cls(deltaTime, data[position:position + length]), position + length
 
 # A brief description of the MIDI specification:
 # - http://www.somascape.org/midi/tech/spec.html
@@ -440,99 +476,142 @@ metaEventByType = {
     0x7F : SequencerEvent,
 }
 
-channelEventByStatus = {
-    0x80 : NoteOffEvent,
-    0x90 : NoteOnEvent,
-    0xA0 : NotePressureEvent,
-    0xB0 : ControllerEvent,
-    0xC0 : ProgramEvent,
-    0xD0 : ChannelPressureEvent,
-    0xE0 : PitchBendEvent,
-}
-
-def unpackVLQ(memoryMap):
-    total = 0
+# Same table as a list, indexed directly by the meta event type (0..255)
+metaEventTable = [None] * 256
+for eventType, eventClass in metaEventByType.items():
+    metaEventTable[eventType] = eventClass
+
+# Most delta times fit in one byte, returned without entering the loop
+def unpackVLQ(data: bytes, position: int) -> tuple[int, int]:
+    char = data[position]
+    position += 1
+    if char < 0x80: return char, position
+    total = char & 0x7F
     while True:
-        char = struct.unpack("B", memoryMap.read(1))[0]
-        total = (total << 7) + (char & 0x7F)
-        if not char & 0x80: break
-    return total
-
-def parseChannelEvent(deltaTime, status, memoryMap):
-    channel = status & 0xF
-    eventClass = channelEventByStatus[status & 0xF0]
-    event = eventClass.fromMemoryMap(deltaTime, channel, memoryMap)
-    if isinstance(event, NoteOnEvent) and event.velocity == 0:
-        return NoteOffEvent(deltaTime, channel, event.note, 0)
-    return event
-
-def parseMetaEvent(deltaTime, memoryMap):
-    eventType = struct.unpack("B", memoryMap.read(1))[0]
-    length = unpackVLQ(memoryMap)
-    eventClass = metaEventByType[eventType]
-    event = eventClass.fromMemoryMap(deltaTime, length, memoryMap)
-    return event
-
-def parseSysExEvent(deltaTime, status, memoryMap):
-    length = unpackVLQ(memoryMap)
-    if status == 0xF0:
-        return SysExEvent.fromMemoryMap(deltaTime, length, memoryMap)
-    elif status == 0xF7:
-        return EscapeSequenceEvent.fromMemoryMap(deltaTime, length, memoryMap)
-
-def parseEvent(memoryMap, parseState):
-    deltaTime = unpackVLQ(memoryMap)
-    status = struct.unpack("B", memoryMap.read(1))[0]
-    
-    if status & 0x80: parseState.runningStatus = status
-    else: memoryMap.seek(-1, SEEK_CUR)
-
-    runningStatus = parseState.runningStatus
-    if runningStatus == 0xFF:
-        return parseMetaEvent(deltaTime, memoryMap)
-    elif runningStatus == 0xF0 or runningStatus == 0xF7:
-        return parseSysExEvent(deltaTime, runningStatus, memoryMap)
-    elif runningStatus >= 0x80:
-        return parseChannelEvent(deltaTime, runningStatus, memoryMap)
-
-@dataclass
-class MidiParseState:
-    runningStatus: int = 0
-
-def parseEvents(memoryMap):
-    events = []
-    parseState = MidiParseState()
+        char = data[position]
+        position += 1
+        total = (total << 7) | (char & 0x7F)
+        if char < 0x80: return total, position
+
+def parseMetaEvent(deltaTime: int, data: bytes, position: int):
+    eventType = data[position]
+    length, position = unpackVLQ(data, position + 1)
+    eventClass = metaEventTable[eventType]
+    if eventClass is None: raise KeyError(eventType)
+    return eventClass.fromBytes(deltaTime, length, data, position)
+
+# Channel events are not turned into event objects: a single walk of the bytes
+# fills columns (absolute tick, status, data1, data2), converted to numpy arrays
+# at the end of the track. A NoteOn with velocity 0 is stored as a NoteOff.
+# The meta events of columnMetaTypes, a few per track, are kept as (tick, event) in a list.
+@dataclass(slots=True, frozen=True)
+class MidiTrackColumns:
+    ticks: np.ndarray
+    statuses: np.ndarray
+    data1: np.ndarray
+    data2: np.ndarray
+    metaEvents: list
+
+# Number of data bytes by channel event status, indexed by status >> 4 & 0x7 (0x80..0xE0 -> 0..6)
+channelEventLengths = [2, 2, 2, 2, 1, 1, 2, 0]
+
+# Meta events read from the columns: track name, tempo and end of track.
+# Other meta and SysEx events are skipped by their length, never decoded.
+columnMetaTypes = frozenset((0x03, 0x2F, 0x51))
+
+def parseColumns(data: bytes) -> MidiTrackColumns:
+    ticks = []
+    statuses = []
+    data1 = []
+    data2 = []
+    metaEvents = []
+    runningStatus = 0
+    timeInTicks = 0
+    position = 0
     while True:
-        event = parseEvent(memoryMap, parseState)
-        events.append(event)
-        if isinstance(event, EndOfTrackEvent): break
-    return events
-
-def parseTrackHeader(memoryMap):
-    identifier = memoryMap.read(4).decode('latin-1')
-    chunkLength = struct.unpack(">I", memoryMap.read(4))[0]
-    return chunkLength
-
+        # one byte delta time inlined, unpackVLQ only for longer ones
+        deltaTime = data[position]
+        if deltaTime < 0x80:
+            position += 1
+        else:
+            deltaTime, position = unpackVLQ(data, position)
+        timeInTicks += deltaTime
+        status = data[position]
+        # A data byte instead of a status byte means running status, it is not consumed
+        if status & 0x80:
+            runningStatus = status
+            position += 1
+        if runningStatus >= 0xF0:
+            if runningStatus != 0xFF:
+                length, position = unpackVLQ(data, position)
+                position += length
+                continue
+            if data[position] not in columnMetaTypes:
+                length, position = unpackVLQ(data, position + 1)
+                position += length
+                continue
+            event, position = parseMetaEvent(deltaTime, data, position)
+            metaEvents.append((timeInTicks, event))
+            if isinstance(event, EndOfTrackEvent): break
+            continue
+        if runningStatus < 0x80:
+            raise ValueError(f"MIDI data byte {status:#04x} without running status")
+        length = channelEventLengths[(runningStatus >> 4) & 0x7]
+        first = data[position]
+        second = data[position + 1] if length == 2 else 0
+        position += length
+        if runningStatus & 0xF0 == 0x90 and second == 0:
+            statuses.append(0x80 | (runningStatus & 0xF))
+        else:
+            statuses.append(runningStatus)
+        ticks.append(timeInTicks)
+        data1.append(first)
+        data2.append(second)
+    return MidiTrackColumns(
+        np.array(ticks, dtype=np.int64),
+        np.array(statuses, dtype=np.uint8),
+        np.array(data1, dtype=np.uint8),
+        np.array(data2, dtype=np.uint8),
+        metaEvents
+    )
+
+# Chunk headers decoded with one precompiled unpack_from, no slice per field
+trackHeaderStruct = Struct(">4sI")
+fileHeaderStruct = Struct(">4sIHHH")
+
+def parseTrackHeader(data: bytes, position: int) -> tuple[int, int]:
+    chunkType, chunkLength = trackHeaderStruct.unpack_from(data, position)
+    if chunkType != b"MTrk":
+        raise ValueError(f"MIDI track chunk expected at byte {position}")
+    return chunkLength, position + 8
+
+# The raw chunk is kept, columns are parsed on first access only
 @dataclass
 class MidiTrack:
-    events: List
+    data: bytes
 
     @classmethod
-    def fromMemoryMap(cls, memoryMap):
-        chunkLength = parseTrackHeader(memoryMap)
-        events = parseEvents(memoryMap)
-        return cls(events)
-
-def parseHeader(memoryMap):
-    identifier = memoryMap.read(4).decode('latin-1')
-    chunkLength = struct.unpack(">I", memoryMap.read(4))[0]
-    midiFormat = struct.unpack(">H", memoryMap.read(2))[0]
-    tracksCount = struct.unpack(">H", memoryMap.read(2))[0]
-    ppqn = struct.unpack(">H", memoryMap.read(2))[0]
-    return midiFormat, tracksCount, ppqn
-
-def parseTracks(memoryMap, tracksCount):
-    return [MidiTrack.fromMemoryMap(memoryMap) for i in range(tracksCount)]
+    def fromBytes(cls, data, position):
+        chunkLength, position = parseTrackHeader(data, position)
+        return cls(data[position:position + chunkLength]), position + chunkLength
+
+    # Parsed once, shared by the tempo map and the note extraction
+    @cached_property
+    def columns(self):
+        return parseColumns(self.data)
+
+def parseHeader(data: bytes) -> tuple[int, int, int, int]:
+    if data[0:4] != b"MThd":
+        raise ValueError("Not a MIDI file, MThd header expected")
+    chunkType, chunkLength, midiFormat, tracksCount, ppqn = fileHeaderStruct.unpack_from(data, 0)
+    return midiFormat, tracksCount, ppqn, 8 + chunkLength
+
+def parseTracks(data: bytes, position: int, tracksCount: int) -> List["MidiTrack"]:
+    tracks = []
+    for i in range(tracksCount):
+        track, position = MidiTrack.fromBytes(data, position)
+        tracks.append(track)
+    return tracks
 
 @dataclass
 class MidiFile:
@@ -544,12 +623,11 @@ class MidiFile:
     @classmethod
     def fromFile(cls, filePath):
         with open(filePath, "rb") as f:
-            memoryMap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
-            midiFormat, tracksCount, ppqn = parseHeader(memoryMap)
-            tracks = parseTracks(memoryMap, tracksCount)
-            memoryMap.close()
-            tempo = -1 # initialisation
-            return cls(midiFormat, ppqn, tempo, tracks)
+            data = f.read()
+        midiFormat, tracksCount, ppqn, position = parseHeader(data)
+        tracks = parseTracks(data, position, tracksCount)
+        tempo = -1 # initialisation
+        return cls(midiFormat, ppqn, tempo, tracks)
 
 # Notes:
 # - If no tempo event was found, a default tempo event of tempo 500,000 will be
@@ -559,38 +637,91 @@ class MidiFile:
 #   events that represents the tempo map of all other tracks. So the code is
 #   written accordingly.
 
-@dataclass
+from bisect import bisect_right
+
+@dataclass(slots=True, frozen=True)
 class TempoEventRecord:
     timeInTicks: int
     timeInSeconds: int
     tempo: int
 
+# Tempo used before the first tempo event of a track
+defaultTempoRecord = TempoEventRecord(0, 0, 500_000)
+
+# Notes:
+# - tempoTicks holds, per tempo track, the timeInTicks of its tempo events, in
+#   the same order as tempoTracks. Ticks are non decreasing, so the tempo active
+#   at a given tick is found by bisection instead of scanning all tempo events.
+# - bisect is used rather than numpy.searchsorted: lookups are done one tick at a
+#   time while events are parsed, and the tick lists grow during computeTempoTracks.
+
 class TempoMap:
     def __init__(self, midiFile):
         self.ppqn = midiFile.ppqn
         self.midiFormat = midiFile.midiFormat
         self.computeTempoTracks(midiFile)
+        self.computeConstantTempos()
+        self.computeTempoArrays()
 
     def computeTempoTracks(self, midiFile):
         tracks = midiFile.tracks
         if midiFile.midiFormat == 1: tracks = tracks[0:1]
-        self.tempoTracks = [[] * len(tracks)]
+        self.tempoTracks = [[] for _ in tracks]
+        self.tempoTicks = [[] for _ in tracks]
         for trackIndex, track in enumerate(tracks):
-            timeInTicks = 0
-            timeInSeconds = 0
             tempoEvents = self.tempoTracks[trackIndex]
-            for event in track.events:
-                timeInTicks += event.deltaTime
-                timeInSeconds = self.timeInTicksToSeconds(trackIndex, timeInTicks)
+            tempoTicks = self.tempoTicks[trackIndex]
+            for timeInTicks, event in track.columns.metaEvents:
                 if not isinstance(event, TempoEvent): continue
+                timeInSeconds = self.timeInTicksToSeconds(trackIndex, timeInTicks)
                 tempoEvents.append(TempoEventRecord(timeInTicks, timeInSeconds, event.tempo))
+                tempoTicks.append(timeInTicks)
+
+    # A tempo track is constant when all its tempo events (if any) are at tick 0,
+    # time in seconds is then timeInTicks * secondsPerTick, no tempo event lookup
+    def computeConstantTempos(self):
+        self.secondsPerTick = []
+        for tempoEvents, tempoTicks in zip(self.tempoTracks, self.tempoTicks):
+            if any(tempoTicks):
+                self.secondsPerTick.append(None)
+                continue
+            tempo = tempoEvents[-1].tempo if tempoEvents else defaultTempoRecord.tempo
+            self.secondsPerTick.append((tempo / self.ppqn) / 1_000_000)
+        self.isConstant = all(secondsPerTick is not None for secondsPerTick in self.secondsPerTick)
+
+    # Tempo events of each track as arrays for ticksToSeconds, built once instead
+    # of on every call, defaultTempoRecord first for ticks before the first tempo event
+    def computeTempoArrays(self):
+        self.tempoArrays = []
+        for tempoEvents, tempoTicks in zip(self.tempoTracks, self.tempoTicks):
+            tempoEvents = [defaultTempoRecord] + tempoEvents
+            self.tempoArrays.append((
+                np.array(tempoTicks, dtype=np.int64),
+                np.array([tempoEvent.timeInTicks for tempoEvent in tempoEvents], dtype=np.int64),
+                np.array([tempoEvent.timeInSeconds for tempoEvent in tempoEvents], dtype=np.float64),
+                np.array([(tempoEvent.tempo / self.ppqn) / 1_000_000 for tempoEvent in tempoEvents])
+            ))
+
+    # secondsPerTick of the tempo track used by trackIndex, None if tempo changes
+    def constantSecondsPerTick(self, trackIndex: int) -> float | None:
+        trackIndex = trackIndex if self.midiFormat != 1 else 0
+        return self.secondsPerTick[trackIndex]
 
-    def timeInTicksToSeconds(self, trackIndex, timeInTicks):
+    # timeInTicksToSeconds for an array of ticks, same operations so same values
+    def ticksToSeconds(self, trackIndex: int, ticks: np.ndarray) -> np.ndarray:
+        secondsPerTick = self.constantSecondsPerTick(trackIndex)
+        if secondsPerTick is not None:
+            return ticks * secondsPerTick
         trackIndex = trackIndex if self.midiFormat != 1 else 0
-        tempoEvents = self.tempoTracks[trackIndex]
-        matchFunction = lambda event: event.timeInTicks <= timeInTicks
-        matchedEvents = filter(matchFunction, reversed(tempoEvents))
-        tempoEvent = next(matchedEvents, TempoEventRecord(0, 0, 500_000))
+        tempoTicks, startTicks, startSeconds, secondsPerTicks = self.tempoArrays[trackIndex]
+        indexes = np.searchsorted(tempoTicks, ticks, side="right")
+        return startSeconds[indexes] + (ticks - startTicks[indexes]) * secondsPerTicks[indexes]
+
+    def timeInTicksToSeconds(self, trackIndex: int, timeInTicks: int) -> float:
+        trackIndex = trackIndex if self.midiFormat != 1 else 0
+        # last tempo event at or before timeInTicks
+        index = bisect_right(self.tempoTicks[trackIndex], timeInTicks) - 1
+        tempoEvent = self.tempoTracks[trackIndex][index] if index >= 0 else defaultTempoRecord
         microSecondsPerTick = tempoEvent.tempo / self.ppqn
         secondsPerTick = microSecondsPerTick / 1_000_000
         elapsedSeconds = (timeInTicks - tempoEvent.timeInTicks) * secondsPerTick
@@ -604,35 +735,41 @@ class TempoMap:
 # - The MIDI parser takes care of running-status Note On Events with zero velocity
 #   so the code needn't check for that.
 
-@dataclass
+@dataclass(slots=True)
 class NoteOnRecord:
     ticks: int
     time: float
     velocity: float
     numberOfNotes: int = 1
 
+# noteOnTable is a flat list with one slot per (channel, note), index (channel << 7) | note:
+# a list index instead of building and hashing a tuple key for every note event
+# timeInTicks / timeInSeconds are set by readMIDIFile for note events only,
+# other events never need a time in seconds
 class TrackState:
+    # slots, timeInTicks / timeInSeconds are set once per note event
+    __slots__ = ("timeInTicks", "timeInSeconds", "noteOnTable")
+
     def __init__(self):
         self.timeInTicks = 0
         self.timeInSeconds = 0
-        self.noteOnTable = dict()
+        self.noteOnTable = [None] * (16 * 128)
 
-    def updateTime(self, trackIndex, tempoMap, deltaTime):
-        self.timeInTicks += deltaTime
-        self.timeInSeconds = tempoMap.timeInTicksToSeconds(trackIndex, self.timeInTicks)
-
-    def recordNoteOn(self, event):
-        key = (event.channel, event.note)
-        if key in self.noteOnTable:
-            self.noteOnTable[key].numberOfNotes += 1
+    def recordNoteOn(self, channel: int, note: int, velocity: int) -> None:
+        key = (channel << 7) | note
+        noteOnRecord = self.noteOnTable[key]
+        if noteOnRecord is not None:
+            noteOnRecord.numberOfNotes += 1
         else:
-            self.noteOnTable[key] = NoteOnRecord(self.timeInTicks, self.timeInSeconds, event.velocity / 127)
+            self.noteOnTable[key] = NoteOnRecord(self.timeInTicks, self.timeInSeconds, velocity / 127)
 
-    def getCorrespondingNoteOnRecord(self, event):
-        key = (event.channel, event.note)
+    def getCorrespondingNoteOnRecord(self, channel: int, note: int) -> NoteOnRecord | None:
+        key = (channel << 7) | note
         noteOnRecord = self.noteOnTable[key]
+        if noteOnRecord is None:
+            raise KeyError((channel, note))
         if noteOnRecord.numberOfNotes == 1:
-            del self.noteOnTable[key]
+            self.noteOnTable[key] = None
             return noteOnRecord
         else:
             noteOnRecord.numberOfNotes -= 1
@@ -652,31 +789,45 @@ def readMIDIFile(path):
     trackIndexUsed = 0
     for trackIndex, track in enumerate(fileTracks):
         notes = []
-        notesUsed = []
         trackName = ""
         trackState = TrackState()
-        minNote = 1000
         minDurationInTicks = 1000000
-        maxNote = 0
-        for event in track.events:
-            trackState.updateTime(trackIndex, tempoMap, event.deltaTime)
+        columns = track.columns
+        for timeInTicks, event in columns.metaEvents:
             if isinstance(event, TrackNameEvent):
                 trackName = event.name
-            elif isinstance(event, NoteOnEvent):
-                trackState.recordNoteOn(event)
-                minNote = min(minNote, event.note)
-                maxNote = max(maxNote, event.note)
-                # add note in notesUsed if not already
-                if event.note not in notesUsed:
-                    notesUsed.append(event.note)
-            elif isinstance(event, NoteOffEvent):
-                noteOnRecord = trackState.getCorrespondingNoteOnRecord(event)
+        # only NoteOn / NoteOff are paired, times in seconds computed in one go
+        statuses = columns.statuses
+        isNoteEvent = (statuses & 0xE0) == 0x80
+        ticks = columns.ticks[isNoteEvent]
+        seconds = tempoMap.ticksToSeconds(trackIndex, ticks)
+        statuses = statuses[isNoteEvent]
+        noteNumbers = columns.data1[isNoteEvent]
+        # min, max and notes used (in order of appearance) from the NoteOn events
+        notesOn = noteNumbers[statuses >= 0x90]
+        if notesOn.size:
+            minNote, maxNote = int(notesOn.min()), int(notesOn.max())
+            notesUsed, firstIndexes = np.unique(notesOn, return_index=True)
+            notesUsed = notesUsed[np.argsort(firstIndexes)].tolist()
+        else:
+            minNote, maxNote, notesUsed = 1000, 0, []
+        # bind hot lookups to locals, the loop below only pairs NoteOn / NoteOff
+        recordNoteOn = trackState.recordNoteOn
+        getCorrespondingNoteOnRecord = trackState.getCorrespondingNoteOnRecord
+        appendNote = notes.append
+        for timeInTicks, timeInSeconds, status, note, velocity in zip(
+            ticks.tolist(), seconds.tolist(), statuses.tolist(),
+            noteNumbers.tolist(), columns.data2[isNoteEvent].tolist()):
+            trackState.timeInTicks = timeInTicks
+            trackState.timeInSeconds = timeInSeconds
+            channel = status & 0xF
+            if status >= 0x90:
+                recordNoteOn(channel, note, velocity)
+            else:
+                noteOnRecord = getCorrespondingNoteOnRecord(channel, note)
                 if noteOnRecord is None: continue
-                startTime = noteOnRecord.time
-                velocity = noteOnRecord.velocity
-                endTime = trackState.timeInSeconds
-                notes.append(MIDINote(event.channel, event.note, startTime, endTime, velocity))
-                minDurationInTicks = min(minDurationInTicks, trackState.timeInTicks - noteOnRecord.ticks) # not used yet
+                appendNote(MIDINote(channel, note, noteOnRecord.time, timeInSeconds, noteOnRecord.velocity))
+                minDurationInTicks = min(minDurationInTicks, timeInTicks - noteOnRecord.ticks) # not used yet
         # add track only if exist notes inside
         if bool(notesUsed):
             workingTracks.append(MIDITrack(trackName, trackIndexUsed, minNote, maxNote, notes, notesUsed))
@@ -685,20 +836,15 @@ def readMIDIFile(path):
     if midiFile.midiFormat == 0:
         trackIndexUsed = 0
         tracks = []
-        for channel in range(16):
-            notes = []
-            notesUsed = []
-            minNote = 1000
-            maxNote = 0
-            for note in workingTracks[0].notes:
-                if note.channel == channel:
-                    notes.append(note)
-                    minNote = min(minNote, note.noteNumber)
-                    maxNote = max(maxNote, note.noteNumber)
-                    if note.noteNumber not in notesUsed:
-                        notesUsed.append(note.noteNumber)
+        # one pass over the notes to split them by channel
+        notesByChannel = [[] for _ in range(16)]
+        for note in workingTracks[0].notes:
+            notesByChannel[note.channel].append(note)
+        for channel, notes in enumerate(notesByChannel):
+            # notes used in order of appearance, dict keys instead of a list membership test per note
+            notesUsed = list(dict.fromkeys(note.noteNumber for note in notes))
             if bool(notesUsed):
-                tracks.append(MIDITrack(f"{workingTracks[0].name}-ch{channel}", trackIndexUsed, minNote, maxNote, notes, notesUsed))
+                tracks.append(MIDITrack(f"{workingTracks[0].name}-ch{channel}", trackIndexUsed, min(notesUsed), max(notesUsed), notes, notesUsed))
                 trackIndexUsed += 1
     # else, midifile format 1, 2 then use workingTracks previously created
     else:
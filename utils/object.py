@@ -3,6 +3,17 @@ from config.config import bCon, bOps, bDat, bTyp, BlenderObjectType
 from utils.collection import moveToCollection
 from math import atan2
 import bmesh
+import numpy as np
+
+# Custom attributes: name, default value and UI settings (limits, description)
+customAttributes = (
+    ("baseColor", 0.0, dict(min=0.0, max=1.0, step=0.01, description="Color factor for base Color (0 to 1)")),
+    ("baseSaturation", 1.0, dict(min=0.0, max=1.0, step=0.01, description="Saturation factor for base Color (0 to 1)")),
+    ("emissionColor", 0.0, dict(min=0.0, max=1.0, step=0.01, description="Color factor for the emission (0 to 1)")),
+    ("emissionStrength", 0.0, dict(min=0.0, soft_min=0.0, soft_max=50.0, description="Strength of the emission")),
+    ("alpha", 1.0, dict(min=0.0, max=1.0, soft_min=0.0, soft_max=50.0, description="Alpha transparency")),
+    ("noteStatus", 0.0, dict(min=0.0, max=1.0, step=0.01, description="Mean if note Off = 0.0 else = velocity")),
+)
 
 """
 Creates custom attributes for Blender objects to control material properties.
@@ -33,52 +44,69 @@ Usage:
     createCustomAttributes(blender_object)
 """
 def createCustomAttributes(obj):
-    # Add custom attributes
-    obj["baseColor"] = 0.0  # Base color as a float
-    obj.id_properties_ui("baseColor").update(
-        min=0.0,  # Minimum value
-        max=1.0,  # Maximum value
-        step=0.01,  # Step size for the slider
-        description="Color factor for base Color (0 to 1)"
-    )
-    obj["baseSaturation"] = 1.0  # Base saturation as a float
-    obj.id_properties_ui("baseSaturation").update(
-        min=0.0,  # Minimum value
-        max=1.0,  # Maximum value
-        step=0.01,  # Step size for the slider
-        description="Saturation factor for base Color (0 to 1)"
-    )
-    obj["emissionColor"] = 0.0  # Emission color as a float
-    obj.id_properties_ui("emissionColor").update(
-        min=0.0,  # Minimum value
-        max=1.0,  # Maximum value
-        step=0.01,  # Step size for the slider
-        description="Color factor for the emission (0 to 1)"
-    )
-    obj["emissionStrength"] = 0.0  # Emission strength as a float
-    obj.id_properties_ui("emissionStrength").update(
-        min=0.0,  # Minimum value
-        soft_min=0.0,  # Soft minimum for UI
-        soft_max=50.0,  # Soft maximum for UI
-        description="Strength of the emission"
-    )
-    obj["alpha"] = 1.0  # Emission strength as a float
-    obj.id_properties_ui("alpha").update(
-        min=0.0, # Minimum value
-        max=1.0, # Maximum value
-        soft_min=0.0,  # Soft minimum for UI
-        soft_max=50.0,  # Soft maximum for UI
-        description="Alpha transparency"
-    )
-    obj["noteStatus"] = 0.0  # Status of note as a float
-    obj.id_properties_ui("noteStatus").update(
-        min=0.0,  # Minimum value
-        max=1.0,  # Maximum value
-        step=0.01,  # Step size for the slider
-        description="Mean if note Off = 0.0 else = velocity"
-    )
-    return
+    # Only model objects get them here, their duplicates (Object.copy) inherit
+    # the properties and their UI settings without any call
+    for name, default, uiSettings in customAttributes:
+        obj[name] = default
+        obj.id_properties_ui(name).update(**uiSettings)
     
+# Stops of the HSV colour ramps driven by baseColor / emissionColor
+colorRampPositions = (0.01, 0.02, 0.40, 0.60, 0.80)  # added between the default 0.0 and 1.0 stops
+colorRampColors = np.array([
+    (0, 0, 0, 1),  # Black 0.0
+    (1, 1, 1, 1),  # White 0.01
+    (0, 0, 1, 1),  # Blue 0.02
+    (1, 0, 0, 1),  # Red 0.4
+    (1, 1, 0, 1),  # Yellow 0.6
+    (0, 1, 0, 1),  # Green 0.8
+    (0, 1, 1, 1),  # Cyan 1.0
+], dtype=np.float32)
+
+# Stops are added in ascending order, then all colours set with one foreach_set
+def setColorRampStops(colorRamp):
+    elements = colorRamp.elements
+    for position in colorRampPositions:
+        elements.new(position)
+    elements.foreach_set("color", colorRampColors.ravel())
+
+# Mesh built from a bmesh: no operator call, so no scene update and no
+# selection / active object change for each object created
+def meshFromBmesh(name, bm):
+    mesh = bDat.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
+
+# Unit plane and cube geometries are built once and shared by all objects
+# (same as linked duplicates). The material is kept on the shared mesh, so
+# there is one shared mesh per material, its name is part of the mesh name
+def sharedMeshName(baseName, material):
+    return f"{baseName}_{material.name}" if material else baseName
+
+def sharedPlaneMesh(material):
+    meshName = sharedMeshName("M2B_Plane", material)
+    if meshName in bDat.meshes:
+        return bDat.meshes[meshName]
+    # same geometry as primitive_plane_add(size=1)
+    bm = bmesh.new()
+    bm.loops.layers.uv.new("UVMap")
+    bmesh.ops.create_grid(bm, x_segments=1, y_segments=1, size=0.5, calc_uvs=True)
+    return meshFromBmesh(meshName, bm)
+
+def sharedCubeMesh(bevel, material):
+    meshName = sharedMeshName("M2B_CubeBevel" if bevel else "M2B_Cube", material)
+    if meshName in bDat.meshes:
+        return bDat.meshes[meshName]
+    # same geometry as primitive_cube_add(size=1)
+    bm = bmesh.new()
+    bm.loops.layers.uv.new("UVMap")
+    bmesh.ops.create_cube(bm, size=1, calc_uvs=True)
+    if bevel:
+        # bevel baked into the mesh, defaults of the BEVEL modifier
+        bmesh.ops.bevel(bm, geom=bm.verts[:] + bm.edges[:], offset=0.1, offset_type='OFFSET',
+            segments=1, profile=0.5, affect='EDGES', clamp_overlap=True)
+    return meshFromBmesh(meshName, bm)
+
 """
 Creates a Blender object with specified parameters and setup.
 
@@ -124,13 +152,17 @@ def createBlenderObject(
     
     match objectType:
         case BlenderObjectType.PLANE:
-            bOps.mesh.primitive_plane_add(size=1, location=location)
-            obj = bCon.active_object
+            obj = bDat.objects.new(name, sharedPlaneMesh(material))
+            obj.location = location
             obj.scale = (width, height, 1)
             
         case BlenderObjectType.ICOSPHERE:
-            bOps.mesh.primitive_ico_sphere_add(radius=radius, location=location)
-            obj = bCon.active_object
+            # same geometry as primitive_ico_sphere_add(radius=radius)
+            bm = bmesh.new()
+            bm.loops.layers.uv.new("UVMap")
+            bmesh.ops.create_icosphere(bm, subdivisions=2, radius=radius, calc_uvs=True)
+            obj = bDat.objects.new(name, meshFromBmesh(name, bm))
+            obj.location = location
             
         # Create a UV Sphere with re-ordered vertices from 0 at north pole
         # from top to bottom in each ring
@@ -199,16 +231,18 @@ def createBlenderObject(
             obj = bCon.active_object
 
         case BlenderObjectType.CUBE:
-            bOps.mesh.primitive_cube_add(size=1, location=location)
-            obj = bCon.active_object
+            obj = bDat.objects.new(name, sharedCubeMesh(bevel, material))
+            obj.location = location
             obj.scale = scale
-            if bevel:
-                bOps.object.modifier_add(type="BEVEL")
-                bOps.object.modifier_apply(modifier="BEVEL")
                 
         case BlenderObjectType.CYLINDER:
-            bOps.mesh.primitive_cylinder_add(radius=radius, depth=height, location=location)
-            obj = bCon.active_object
+            # same geometry as primitive_cylinder_add(radius=radius, depth=height)
+            bm = bmesh.new()
+            bm.loops.layers.uv.new("UVMap")
+            bmesh.ops.create_cone(bm, cap_ends=True, cap_tris=False, segments=32,
+                radius1=radius, radius2=radius, depth=height, calc_uvs=True)
+            obj = bDat.objects.new(name, meshFromBmesh(name, bm))
+            obj.location = location
             obj.scale = (radius, radius, height)
             
         case BlenderObjectType.BEZIER_CIRCLE:
@@ -217,8 +251,8 @@ def createBlenderObject(
             obj.data.resolution_u = resolution
             
         case BlenderObjectType.POINT:
-            bOps.object.light_add(type=typeLight, location=location)
-            obj = bCon.active_object
+            obj = bDat.objects.new(name, bDat.lights.new(name, type=typeLight))
+            obj.location = location
 
             # Get the Light data
             objData = obj.data
@@ -227,8 +261,8 @@ def createBlenderObject(
             objData.color = (1.0,1.0,1.0)
 
         case BlenderObjectType.LIGHTSHOW:
-            bOps.object.light_add(type=typeLight, location=location)
-            obj = bCon.active_object
+            obj = bDat.objects.new(name, bDat.lights.new(name, type=typeLight))
+            obj.location = location
 
             # Get the Light data
             objData = obj.data
@@ -251,18 +285,7 @@ def createBlenderObject(
             colorRampEmission.location = (-400, 0)
             colorRampEmission.color_ramp.color_mode = 'HSV'
             colorRampEmission.color_ramp.interpolation = 'CARDINAL'  # Ensure cardinal interpolation
-            colorRampEmission.color_ramp.elements.new(0.01)  # Add a stop at 0.01
-            colorRampEmission.color_ramp.elements.new(0.02)  # Add a stop at 0.02
-            colorRampEmission.color_ramp.elements.new(0.40)  # Add a stop at 0.40
-            colorRampEmission.color_ramp.elements.new(0.60)  # Add a stop at 0.60
-            colorRampEmission.color_ramp.elements.new(0.80)  # Add a stop at 0.80
-            colorRampEmission.color_ramp.elements[0].color = (0, 0, 0, 1)  # Black 0.0
-            colorRampEmission.color_ramp.elements[1].color = (1, 1, 1, 1)  # White 0.01
-            colorRampEmission.color_ramp.elements[2].color = (0, 0, 1, 1)  # Blue 0.02
-            colorRampEmission.color_ramp.elements[3].color = (1, 0, 0, 1)  # Red 0.4
-            colorRampEmission.color_ramp.elements[4].color = (1, 1, 0, 1)  # Yellow 0.6
-            colorRampEmission.color_ramp.elements[5].color = (0, 1, 0, 1)  # Green 0.8
-            colorRampEmission.color_ramp.elements[6].color = (0, 1, 1, 1)  # Cyan 1.0
+            setColorRampStops(colorRampEmission.color_ramp)  # Black, White, Blue, Red, Yellow, Green, Cyan
 
             # Add Texture Coordinate node before Voronoi
             texCoord = nodes.new(type='ShaderNodeTexCoord')
@@ -337,15 +360,15 @@ def createBlenderObject(
             driver.expression = "emissionColor"
             
         case BlenderObjectType.EMPTY:
-            bOps.object.empty_add(type='PLAIN_AXES', location=location)
-            obj = bCon.active_object
-            obj.name = name
+            obj = bDat.objects.new(name, None)
+            obj.location = location
             obj.empty_display_size = 2.0
             obj.empty_display_type = 'PLAIN_AXES'
 
     # Common setup
     obj.name = name
-    if material:
+    # a shared mesh (one per material) only gets its material on first use
+    if material and material.name not in obj.data.materials:
         obj.data.materials.append(material)
     createCustomAttributes(obj)
     moveToCollection(collection, obj)
@@ -388,10 +411,11 @@ def createDuplicateLinkedObject(collection, originalObject, name, independant=Fa
         linkedObject.name = name
 
     collection.objects.link(linkedObject)
-    # Get collection name and find matching empty in masterLocCollection
-    if glb.masterLocCollection and collection.name+"_MasterLocation" in glb.masterLocCollection.objects:
-        parentEmpty = glb.masterLocCollection.objects[collection.name+"_MasterLocation"]
-        linkedObject.parent = parentEmpty
+    # Get collection name and find matching empty in masterLocCollection, one lookup
+    if glb.masterLocCollection:
+        parentEmpty = glb.masterLocCollection.objects.get(collection.name+"_MasterLocation")
+        if parentEmpty is not None:
+            linkedObject.parent = parentEmpty
     return linkedObject
 
 """
@@ -459,18 +483,7 @@ def CreateMatGlobalCustom():
     colorRampBase.location = (-200, 100)
     colorRampBase.color_ramp.color_mode = 'HSV'
     colorRampBase.color_ramp.interpolation = 'CARDINAL'  # Ensure linear interpolation
-    colorRampBase.color_ramp.elements.new(0.01)  # Add a stop at 0.01
-    colorRampBase.color_ramp.elements.new(0.02)  # Add a stop at 0.02
-    colorRampBase.color_ramp.elements.new(0.40)  # Add a stop at 0.40
-    colorRampBase.color_ramp.elements.new(0.60)  # Add a stop at 0.60
-    colorRampBase.color_ramp.elements.new(0.80)  # Add a stop at 0.80
-    colorRampBase.color_ramp.elements[0].color = (0, 0, 0, 1)  # Black 0.0
-    colorRampBase.color_ramp.elements[1].color = (1, 1, 1, 1)  # White 0.01
-    colorRampBase.color_ramp.elements[2].color = (0, 0, 1, 1)  # Blue 0.02
-    colorRampBase.color_ramp.elements[3].color = (1, 0, 0, 1)  # Red 0.4
-    colorRampBase.color_ramp.elements[4].color = (1, 1, 0, 1)  # Yellow 0.6
-    colorRampBase.color_ramp.elements[5].color = (0, 1, 0, 1)  # Green 0.8
-    colorRampBase.color_ramp.elements[6].color = (0, 1, 1, 1)  # Cyan 1.0
+    setColorRampStops(colorRampBase.color_ramp)  # Black, White, Blue, Red, Yellow, Green, Cyan
 
     mixColorBase = nodes.new(type='ShaderNodeMixRGB')
     mixColorBase.location = (100, 200)
@@ -491,18 +504,7 @@ def CreateMatGlobalCustom():
     colorRampEmission.location = (-200, -100)
     colorRampEmission.color_ramp.color_mode = 'HSV'
     colorRampEmission.color_ramp.interpolation = 'CARDINAL'  # Ensure linear interpolation
-    colorRampEmission.color_ramp.elements.new(0.01)  # Add a stop at 0.01
-    colorRampEmission.color_ramp.elements.new(0.02)  # Add a stop at 0.02
-    colorRampEmission.color_ramp.elements.new(0.40)  # Add a stop at 0.40
-    colorRampEmission.color_ramp.elements.new(0.60)  # Add a stop at 0.60
-    colorRampEmission.color_ramp.elements.new(0.80)  # Add a stop at 0.80
-    colorRampEmission.color_ramp.elements[0].color = (0, 0, 0, 1)  # Black 0.0
-    colorRampEmission.color_ramp.elements[1].color = (1, 1, 1, 1)  # White 0.01
-    colorRampEmission.color_ramp.elements[2].color = (0, 0, 1, 1)  # Blue 0.02
-    colorRampEmission.color_ramp.elements[3].color = (1, 0, 0, 1)  # Red 0.4
-    colorRampEmission.color_ramp.elements[4].color = (1, 1, 0, 1)  # Yellow 0.6
-    colorRampEmission.color_ramp.elements[5].color = (0, 1, 0, 1)  # Green 0.8
-    colorRampEmission.color_ramp.elements[6].color = (0, 1, 1, 1)  # Cyan 1.0
+    setColorRampStops(colorRampEmission.color_ramp)  # Black, White, Blue, Red, Yellow, Green, Cyan
 
     attributeAlpha = nodes.new(type="ShaderNodeAttribute")
     attributeAlpha.location = (-400, -500)
@@ -1,6 +1,8 @@
 from config.globals import *
-from config.config import bDat, bScn, bCon, bOps
+from config.config import bDat, bScn, bCon
 from os import path
+from bpy.path import relpath
+import numpy as np
 
 # Open log file for append
 def initLog(logFile):
@@ -16,6 +18,38 @@ def endLog():
     glb.fLog.close()
 
 import re
+from functools import lru_cache
+
+# A track range segment, single number "7" or range "1-16", compiled once
+trackRangePattern = re.compile(r'(\d+)(?:-(\d+))?')
+
+# Track numbers of a range string like "1-5,7,10-12"
+# Cached: the same mask is parsed again when an animation builds on another one
+@lru_cache(maxsize=None)
+def parseRange(rangeStr):
+    numbers = set()
+    # Divide string in individuals parts
+    for segment in rangeStr.split(','):
+        match = trackRangePattern.fullmatch(segment)
+        if match is None:
+            raise ValueError(f"Invalid format : {segment}")
+        start, end = match.groups()
+        if end is not None:  # Case of range like "1-16"
+            numbers.update(range(int(start), int(end) + 1))
+        else:  # Case of single number
+            numbers.add(int(start))
+    return frozenset(numbers)
+
+# minNote, maxNote, timeFirstOn and timeLastOff of the tracks as arrays, one
+# element per track: ranges over any selection are numpy reductions
+def tracksStats(tracks):
+    count = len(tracks)
+    return (
+        np.fromiter((track.minNote for track in tracks), dtype=np.int64, count=count),
+        np.fromiter((track.maxNote for track in tracks), dtype=np.int64, count=count),
+        np.fromiter((track.timeFirstOn for track in tracks), dtype=np.float64, count=count),
+        np.fromiter((track.timeLastOff for track in tracks), dtype=np.float64, count=count),
+    )
 
 """
     Parses a range string and returns a list of numbers.
@@ -60,40 +94,19 @@ def parseRangeFromTracks(rangeStr):
     tracks = glb.tracks
     wLog(f"Track filter used = {rangeStr}")
 
-    numbers = []
     if rangeStr == "*":
         numbers = range(len(tracks))
     else:
-        # Divide string in individuals parts
-        segments = rangeStr.split(',')
-
-        for segment in segments:
-            match = re.match(r'^(\d+)-(\d+)$', segment)
-            if match:  # Case of range like "1-16"
-                start, end = map(int, match.groups())
-                numbers.extend(range(start, end + 1))
-            elif re.match(r'^\d+$', segment):  # Case of single number
-                numbers.append(int(segment))
-            else:
-                raise ValueError(f"Invalid format : {segment}")
+        numbers = parseRange(rangeStr)
 
     # Evaluate noteMin, noteMax and octaveCount from effective range
-    noteMin = 1000
-    noteMax = 0
-    effectiveTrackCount = 0
-    tracksSelected = ""
-    listOfSelectedTracks = []
-    for trackIndex, track in enumerate(tracks):
-        if trackIndex not in numbers:
-            continue
-        
-        effectiveTrackCount += 1
-        tracksSelected += (f"{trackIndex},")
-        listOfSelectedTracks.append(trackIndex)
-        noteMin = min(noteMin, track.minNote)
-        noteMax = max(noteMax, track.maxNote)
+    listOfSelectedTracks = [trackIndex for trackIndex in range(len(tracks)) if trackIndex in numbers]
+    effectiveTrackCount = len(listOfSelectedTracks)
+    minNotes, maxNotes, timesFirstOn, timesLastOff = tracksStats(tracks)
+    noteMin = int(minNotes[listOfSelectedTracks].min(initial=1000))
+    noteMax = int(maxNotes[listOfSelectedTracks].max(initial=0))
 
-    tracksSelected = tracksSelected[:-1]  # Remove last ,
+    tracksSelected = ",".join(str(trackIndex) for trackIndex in listOfSelectedTracks)
     wLog(f"Track selected are = {tracksSelected}")
 
     octaveCount = (noteMax // 12) - (noteMin // 12) + 1
@@ -103,9 +116,16 @@ def parseRangeFromTracks(rangeStr):
 
     return listOfSelectedTracks, noteMin, noteMax, octaveCount, effectiveTrackCount, tracksColor
 
+# Notes of an octave (noteNumber % 12) played on black keys, one bit per note
+blackNotesMask = 0b010101001010  # C#, D#, F#, G#, A#
+
+# 1 for black keys, 0 for white keys, for every MIDI note number (0-127)
+blackNotes = bytes((blackNotesMask >> (noteNumber % 12)) & 1 for noteNumber in range(128))
+
 # Define color from note number when sharp (black) or flat (white)
+# noteNumber is a MIDI note number (0-127) or a note in octave (0-11)
 def colorFromNoteNumber(noteNumber):
-    if noteNumber in [1, 3, 6, 8, 10]:
+    if blackNotes[noteNumber]:
         return 0.001  # Black note (almost)
     else:
         return 0.01 # White note
@@ -204,21 +224,14 @@ def determineGlobalRanges():
         tuple: (noteMin, noteMax, timeMin, timeMax)
     """
     tracks = glb.tracks
+    minNotes, maxNotes, timesFirstOn, timesLastOff = tracksStats(tracks)
     stats = {
-        'noteMin': 1000,
-        'noteMax': 0,
-        'timeMin': 1000,
-        'timeMax': 0,
+        'noteMin': int(minNotes.min(initial=1000)),
+        'noteMax': int(maxNotes.max(initial=0)),
+        'timeMin': float(timesFirstOn.min(initial=1000)),
+        'timeMax': float(timesLastOff.max(initial=0)),
         'noteMidRange': 0
     }
-    
-    for track in tracks:
-        stats.update({
-            'noteMin': min(stats['noteMin'], track.minNote),
-            'noteMax': max(stats['noteMax'], track.maxNote),
-            'timeMin': min(stats['timeMin'], track.notes[0].timeOn),
-            'timeMax': max(stats['timeMax'], track.notes[-1].timeOff)
-        })
 
     # Calculate mid range for centering
     stats['noteMidRange'] = stats['noteMin'] + (stats['noteMax'] - stats['noteMin']) / 2
@@ -233,18 +246,15 @@ def determineGlobalRanges():
 # into sequencerdef loadaudio(paths):
 def loadaudio(paths):
     if path.exists(paths):
-        if not bScn.sequence_editor:
-            bScn.sequence_editor_create()
-
         # Clear the VSE, then add an audio file
+        # new_sound instead of the operator, no area switch and no UI context needed
         bScn.sequence_editor_clear()
-        my_contextmem = bCon.area.type
-        my_context = 'SEQUENCE_EDITOR'
-        bCon.area.type = my_context
-        my_context = bCon.area.type
-        bOps.sequencer.sound_strip_add(filepath=paths, relative_path=True, frame_start=1, channel=1)
-        bCon.area.type = my_contextmem
-        my_context = bCon.area.type
+        sequenceEditor = bScn.sequence_editor_create()
+        # strips since Blender 4.4, sequences before (removed in 5.0)
+        strips = sequenceEditor.strips if hasattr(sequenceEditor, "strips") else sequenceEditor.sequences
+        # path relative to the .blend file when saved, like the operator's relative_path=True
+        soundPath = relpath(paths) if bDat.is_saved else paths
+        strips.new_sound(path.basename(paths), soundPath, 1, 1)
         wLog("Audio file mp3 is loaded into VSE")
     else:
         wLog("Audio file mp3 not exist")